@@ -1 +1,16 @@
 __all__ = []
+
+
+def _load_env() -> None:
+    # Modules read their settings from the environment at import time, so
+    # .env has to be loaded before any of them are imported
+    try:
+        from dotenv import find_dotenv, load_dotenv
+
+        load_dotenv(find_dotenv(usecwd=True))
+    except Exception:
+        # Continue without raising; app can still run with fallback behavior
+        pass
+
+
+_load_env()
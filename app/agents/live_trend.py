@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import date
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from ..data.db import choose_bucket, get_sentiment_counts, max_review_id
+from ..utils.metrics import incr
+from .plot_agent import (
+    CHART_DECISION_TIMEOUT,
+    ChartType,
+    decide_chart_type_async,
+    heuristic_chart,
+    render_png_async,
+    resolve_prompt,
+    chart_subtitle,
+    png_to_image,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from PIL import Image
+
+
+# Seconds between refreshes of a live chart in the UI
+LIVE_REFRESH_INTERVAL = float(os.getenv("LIVE_REFRESH_INTERVAL", "5"))
+
+
+class LiveTrend:
+    """A trends chart for one prompt that is kept current incrementally.
+
+    The first refresh runs the full pipeline: range parsing, chart decision,
+    range query and render. After that each refresh only counts reviews with
+    an id above the last one seen, adds them to the in-memory table and
+    re-renders when something changed. When the parsed range moves (e.g.
+    "last 7 days" after midnight) the chart is decided again, since its
+    title may name the range, and the table is rebuilt with a full query.
+    """
+
+    def __init__(
+        self,
+        prompt: str,
+        chart_override: Optional[str] = None,
+        bucket: Optional[str] = None,
+        keyword: Optional[str] = None,
+    ) -> None:
+        self.prompt = prompt
+        self.chart_override = chart_override
+        self.requested_bucket = bucket
+        self.requested_keyword = keyword
+        self.range: Optional[Tuple[date, date]] = None
+        self.bucket = "day"
+        self.keyword = ""
+        self.chart: Optional[ChartType] = None
+        self.title = ""
+        self.last_id = 0
+        self.counts: Dict[Any, List[int]] = {}
+        self.png: Optional[bytes] = None
+
+    async def refresh(self) -> Optional[Tuple[Image.Image, pd.DataFrame]]:
+        """Bring the chart up to date; returns (image, table) if it changed, else None."""
+        # Relative ranges are parsed again each time; a dateparser miss would block the loop
+        start_date, end_date, bucket, keyword = await asyncio.to_thread(
+            resolve_prompt, self.prompt, self.requested_bucket, self.requested_keyword
+        )
+        if (start_date, end_date) != self.range:
+            incr("live_refreshes", outcome="full")
+            await self._reload(start_date, end_date, choose_bucket(start_date, end_date, bucket), keyword or "")
+            return await self._render()
+
+        upto = await asyncio.to_thread(max_review_id)
+        if upto <= self.last_id:
+            incr("live_refreshes", outcome="unchanged")
+            return None
+        delta = await asyncio.to_thread(
+            get_sentiment_counts, start_date, end_date, self.bucket, self.keyword, (self.last_id, upto)
+        )
+        self.last_id = upto
+        if delta.empty:
+            incr("live_refreshes", outcome="unchanged")
+            return None
+        incr("live_refreshes", outcome="delta")
+        self._add(delta)
+        return await self._render()
+
+    async def _reload(self, start_date: date, end_date: date, bucket: str, keyword: str) -> None:
+        try:
+            self.chart, self.title = await asyncio.wait_for(
+                decide_chart_type_async(self.prompt, start_date, end_date, bucket, self.chart_override),
+                timeout=CHART_DECISION_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            incr("fallbacks", stage="chart_decision_timeout")
+            self.chart, self.title = heuristic_chart(self.prompt)
+        # Bound the full query by the current max id so the next delta starts exactly after it
+        upto = await asyncio.to_thread(max_review_id)
+        df = await asyncio.to_thread(get_sentiment_counts, start_date, end_date, bucket, keyword, (0, upto))
+        self.range = (start_date, end_date)
+        self.bucket, self.keyword = bucket, keyword
+        self.last_id = upto
+        self.counts = {}
+        self._add(df)
+
+    def _add(self, df: pd.DataFrame) -> None:
+        for period, positive, neutral, negative in df[["date", "positive", "neutral", "negative"]].itertuples(
+            index=False
+        ):
+            row = self.counts.setdefault(period, [0, 0, 0])
+            row[0] += positive
+            row[1] += neutral
+            row[2] += negative
+
+    def table(self) -> pd.DataFrame:
+        import pandas as pd
+
+        periods = sorted(self.counts)
+        df = pd.DataFrame(
+            {
+                "date": periods,
+                "positive": [self.counts[p][0] for p in periods],
+                "neutral": [self.counts[p][1] for p in periods],
+                "negative": [self.counts[p][2] for p in periods],
+            }
+        ).astype({"positive": int, "neutral": int, "negative": int})
+        df.attrs["bucket"], df.attrs["keyword"] = self.bucket, self.keyword
+        return df
+
+    async def _render(self) -> Tuple[Image.Image, pd.DataFrame]:
+        assert self.range is not None and self.chart is not None
+        df = self.table()
+        subtitle = chart_subtitle(self.range[0], self.range[1], self.bucket, self.keyword)
+        self.png = await render_png_async(df, self.chart, self.title, subtitle)
+        return png_to_image(self.png), df
@@ -1,28 +1,71 @@
 from __future__ import annotations
 
 import os
-from typing import Optional
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
 
-from langchain_openai import ChatOpenAI
+if TYPE_CHECKING:
+    import httpx
 
 
-def get_llm() -> Optional[object]:
-    """Return a configured LangChain chat LLM instance if available.
+# Shared keep-alive pool sizing for the OpenAI HTTP clients
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "16"))
 
-    Prefers OpenAI when `OPENAI_API_KEY` is set.
-    Returns None if no LLM configuration is available.
-    """
+_lock = threading.RLock()
+_config: Optional[Tuple[Optional[str], ...]] = None
+_llm: Optional[object] = None
+_override: Optional[object] = None
+_chains: Dict[str, Tuple[object, Any]] = {}
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+
+
+def _config_key() -> Tuple[Optional[str], ...]:
+    return (
+        os.getenv("USE_LLM", "true").lower(),
+        os.getenv("OPENAI_API_KEY"),
+        os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        os.getenv("OPENAI_BASE_URL"),
+    )
+
+
+def _http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    global _http_client, _http_async_client
+    if _http_client is None:
+        import httpx
+        from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
 
+        limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=60.0,
+        )
+        _http_client = DefaultHttpxClient(limits=limits)
+        _http_async_client = DefaultAsyncHttpxClient(limits=limits)
+    return _http_client, _http_async_client  # type: ignore[return-value]
+
+
+def _build_llm() -> Optional[object]:
     # Allow disabling LLM usage explicitly
     if os.getenv("USE_LLM", "true").lower() in {"0", "false", "no"}:
         return None
 
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if openai_api_key:
+        from langchain_openai import ChatOpenAI
+
         # Default lightweight, cost-effective model
         model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        http_client, http_async_client = _http_clients()
         try:
-            return ChatOpenAI(model=model, api_key=openai_api_key, temperature=0.3)
+            return ChatOpenAI(
+                model=model,
+                api_key=openai_api_key,
+                temperature=0.3,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
         except Exception as e:
             # Graceful fallback if environment/proxy issues occur
             print(f"[llm_provider] OpenAI LLM unavailable, falling back: {e}")
@@ -31,6 +74,64 @@ def get_llm() -> Optional[object]:
     return None
 
 
+def get_llm() -> Optional[object]:
+    """Return the configured LangChain chat LLM instance if available.
+
+    Prefers OpenAI when `OPENAI_API_KEY` is set.
+    Returns None if no LLM configuration is available.
+
+    The client is built once per process and rebuilt only when `USE_LLM` or
+    the `OPENAI_*` settings change. All clients share one keep-alive HTTP pool.
+    """
+    global _config, _llm
+    if _override is not None:
+        return _override
+    key = _config_key()
+    if key != _config:
+        with _lock:
+            if key != _config:
+                _llm = _build_llm()
+                _chains.clear()
+                _config = key
+    return _llm
+
+
+def override_llm(llm: Optional[object]) -> None:
+    """Serve `llm` from `get_llm` instead of the configured client; None restores it.
+
+    Lets the benchmarks run the real chains against a local fake model.
+    """
+    global _override, _config
+    with _lock:
+        _override = llm
+        _config = None
+        _chains.clear()
+
+
 def llm_available() -> bool:
     return get_llm() is not None
 
+
+def llm_model_name() -> str:
+    """Name of the model behind `get_llm`, or an empty string when offline."""
+    llm = get_llm()
+    return str(getattr(llm, "model_name", "")) if llm is not None else ""
+
+
+def get_chain(name: str, build: Callable[[object], Any]) -> Optional[Any]:
+    """Return the chain registered as `name`, compiling it with `build(llm)` once.
+
+    Returns None when no LLM is configured. Chains are rebuilt automatically
+    whenever `get_llm` returns a different client.
+    """
+    llm = get_llm()
+    if llm is None:
+        return None
+    entry = _chains.get(name)
+    if entry is None or entry[0] is not llm:
+        with _lock:
+            entry = _chains.get(name)
+            if entry is None or entry[0] is not llm:
+                entry = (llm, build(llm))
+                _chains[name] = entry
+    return entry[1]
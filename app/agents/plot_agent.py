@@ -1,108 +1,413 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import io
-from typing import Literal, Optional, Tuple
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Literal, Optional, Tuple
 
-import matplotlib.pyplot as plt
-import pandas as pd
-from PIL import Image
+from ..data.db import BUCKETS, choose_bucket, get_data_version, get_sentiment_counts
+from ..utils.date_utils import DATE_START, parse_date_range, human_range_label
+from .llm_provider import get_chain
+from .router import route_chart
+from ..utils.metrics import incr, register_stats, span
 
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from pydantic import BaseModel, Field
-
-from ..data.db import get_sentiment_counts_by_day
-from ..utils.date_utils import parse_date_range, human_range_label
-from .llm_provider import get_llm
+if TYPE_CHECKING:
+    import pandas as pd
+    from PIL import Image
 
 
 ChartType = Literal["bar", "line"]
 
+# Seconds to wait for the LLM chart decision before using the heuristic choice
+CHART_DECISION_TIMEOUT = float(os.getenv("PLOT_DECISION_TIMEOUT", "5"))
 
-class PlotDecision(BaseModel):
-    chart: ChartType = Field(description="Chart type (bar or line)")
-    title: str = Field(description="Short, human-friendly chart title")
+# Number of rendered charts kept in memory
+PLOT_CACHE_SIZE = int(os.getenv("PLOT_CACHE_SIZE", "64"))
 
+# Tick label format per time bucket
+_LABEL_FORMATS = {"hour": "%b %d %H:00", "day": "%Y-%m-%d", "week": "%Y-%m-%d", "month": "%b %Y"}
 
-def _decide_chart_type(user_prompt: str, override: Optional[str] = None) -> Tuple[ChartType, str]:
-    if override in {"bar", "line"}:
-        chart = override  # type: ignore
+# "weekly", "by month", "per hour", ... in the prompt selects the bucket
+_BUCKET_WORDS = re.compile(r"\b(?:(hour|dai|week|month)ly|(?:by|per|each) (hour|day|week|month))\b")
+
+# "mentioning broth", "containing 'spicy broth'", "about the \"wait time\"" filters by keyword;
+# unquoted keywords are a single word and never a date ("about yesterday")
+_KEYWORD = re.compile(
+    r"\b(?:mentioning|mentions?|containing|contains|about|with (?:the )?(?:word|keyword))\s+(?:(?:the|a|an)\s+)?"
+    rf"(?:\"([^\"]+)\"|'([^']+)'|(?!(?:the|a|an)\b|{DATE_START.pattern})([\w-]+))"
+)
+
+# Runs the LLM chart decision alongside the date parsing and count query
+_decision_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PLOT_DECISION_WORKERS", "8")), thread_name_prefix="plot-decision"
+)
+
+
+_SYSTEM_PROMPT = (
+    "You are a data visualization assistant. Given a user prompt about sentiment trends, "
+    "choose 'bar' or 'line' for the chart and produce a short title. Return JSON only."
+)
+
+
+# pydantic, langchain_core, pandas, PIL and matplotlib are imported on first use
+@lru_cache(maxsize=None)
+def _plot_decision_schema() -> Any:
+    from pydantic import BaseModel, Field
+
+    class PlotDecision(BaseModel):
+        chart: ChartType = Field(description="Chart type (bar or line)")
+        title: str = Field(description="Short, human-friendly chart title")
+
+    return PlotDecision
+
+
+def __getattr__(name: str) -> Any:
+    if name == "PlotDecision":
+        return _plot_decision_schema()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _build_plot_chain(llm):
+    from langchain_core.output_parsers import JsonOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    parser = JsonOutputParser(pydantic_object=_plot_decision_schema())
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", _SYSTEM_PROMPT),
+            ("human", "{prompt}"),
+        ]
+    )
+    return prompt | llm | parser
+
+
+def heuristic_chart(user_prompt: str) -> Tuple[ChartType, str]:
+    """Chart choice without the LLM: bars if the prompt says so, else a line."""
+    chart: ChartType = "bar" if "bar" in user_prompt.lower() else "line"
+    return chart, "Sentiment trend"
+
+
+def _parse_decision(result) -> Tuple[ChartType, str]:
+    if isinstance(result, dict):
+        decision = _plot_decision_schema()(**result)
     else:
-        llm = get_llm()
-        if llm is None:
-            # Heuristic fallback
-            chart = "bar" if "bar" in user_prompt.lower() else "line"
-            title = "Sentiment trend"
-            return chart, title
-
-        parser = JsonOutputParser(pydantic_object=PlotDecision)
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "You are a data visualization assistant. Given a user prompt about sentiment trends, "
-                    "choose 'bar' or 'line' for the chart and produce a short title. Return JSON only.",
-                ),
-                ("human", "{prompt}"),
-            ]
-        )
-        chain = prompt | llm | parser
+        decision = result  # type: ignore
+    return decision.chart, decision.title
+
+
+def _route_chart(user_prompt: str, start_date: date, end_date: date, bucket: str) -> Optional[Tuple[ChartType, str]]:
+    _, date_prompt = _keyword_from_prompt(user_prompt)
+    return route_chart(date_prompt, start_date, end_date, bucket)
+
+
+def decide_chart_type(
+    user_prompt: str, start_date: date, end_date: date, bucket: str, override: Optional[str] = None
+) -> Tuple[ChartType, str]:
+    """Chart type and title; the range and bucket are the already resolved ones the counts use."""
+    if override in {"bar", "line"}:
+        return override, "Sentiment trend"  # type: ignore[return-value]
+    routed = _route_chart(user_prompt, start_date, end_date, bucket)
+    if routed is not None:
+        return routed
+
+    chain = get_chain("plot", _build_plot_chain)
+    if chain is None:
+        # Heuristic fallback
+        return heuristic_chart(user_prompt)
+    try:
+        with span("chart_decision"):
+            return _parse_decision(chain.invoke({"prompt": user_prompt}))
+    except Exception:
+        incr("fallbacks", stage="chart_decision")
+        return heuristic_chart(user_prompt)
+
+
+async def decide_chart_type_async(
+    user_prompt: str, start_date: date, end_date: date, bucket: str, override: Optional[str] = None
+) -> Tuple[ChartType, str]:
+    if override in {"bar", "line"}:
+        return override, "Sentiment trend"  # type: ignore[return-value]
+    routed = _route_chart(user_prompt, start_date, end_date, bucket)
+    if routed is not None:
+        return routed
+
+    chain = get_chain("plot", _build_plot_chain)
+    if chain is None:
+        return heuristic_chart(user_prompt)
+    try:
+        with span("chart_decision"):
+            return _parse_decision(await chain.ainvoke({"prompt": user_prompt}))
+    except Exception:
+        incr("fallbacks", stage="chart_decision")
+        return heuristic_chart(user_prompt)
+
+
+# (start, end, bucket, keyword, chart, title, data version)
+PlotCacheKey = Tuple[date, date, str, str, str, str, int]
+
+_plot_cache: OrderedDict[PlotCacheKey, Tuple[bytes, pd.DataFrame]] = OrderedDict()
+_plot_cache_lock = threading.Lock()
+_plot_cache_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+
+def _plot_cache_get(key: PlotCacheKey) -> Optional[Tuple[bytes, pd.DataFrame]]:
+    with _plot_cache_lock:
+        entry = _plot_cache.get(key)
+        if entry is None:
+            _plot_cache_stats["misses"] += 1
+            return None
+        _plot_cache.move_to_end(key)
+        _plot_cache_stats["hits"] += 1
+        return entry
+
+
+def _plot_cache_put(key: PlotCacheKey, png: bytes, df: pd.DataFrame) -> None:
+    if PLOT_CACHE_SIZE <= 0:
+        return
+    with _plot_cache_lock:
+        _plot_cache[key] = (png, df)
+        _plot_cache.move_to_end(key)
+        while len(_plot_cache) > PLOT_CACHE_SIZE:
+            _plot_cache.popitem(last=False)
+
+
+def plot_cache_stats() -> Dict[str, float]:
+    with _plot_cache_lock:
+        stats: Dict[str, float] = dict(_plot_cache_stats)
+        stats["entries"] = len(_plot_cache)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+register_stats("plot_cache", plot_cache_stats)
+
+
+def _render_args(df: pd.DataFrame, chart: ChartType, title: str, subtitle: str) -> Tuple[Any, ...]:
+    import pandas as pd
+
+    bucket = df.attrs.get("bucket", "day")
+    # Plain lists keep the payload cheap to pickle for the render processes
+    labels = pd.to_datetime(df["date"]).dt.strftime(_LABEL_FORMATS[bucket]).tolist() if not df.empty else []
+    return (
+        labels,
+        df["positive"].tolist(),
+        df["neutral"].tolist(),
+        df["negative"].tolist(),
+        chart,
+        title,
+        subtitle,
+        bucket,
+    )
+
+
+@span("render")
+def render_png(df: pd.DataFrame, chart: ChartType, title: str, subtitle: str) -> bytes:
+    """Render the counts chart to PNG bytes, in the render process pool when configured."""
+    from .render import render_counts_png, render_executor, reset_render_executor
+
+    args = _render_args(df, chart, title, subtitle)
+    pool = render_executor()
+    if pool is not None:
         try:
-            result = chain.invoke({"prompt": user_prompt})
-            if isinstance(result, dict):
-                decision = PlotDecision(**result)
-            else:
-                decision = result  # type: ignore
-            return decision.chart, decision.title
-        except Exception:
-            chart = "bar" if "bar" in user_prompt.lower() else "line"
-            return chart, "Sentiment trend"
+            return pool.submit(render_counts_png, *args).result()
+        except BrokenProcessPool:
+            incr("fallbacks", stage="render_pool")
+            print("[plot_agent] Render pool crashed, restarting it and rendering in-thread")
+            reset_render_executor()
+    return render_counts_png(*args)
 
-    return chart, "Sentiment trend"
+
+async def render_png_async(df: pd.DataFrame, chart: ChartType, title: str, subtitle: str) -> bytes:
+    """Like `render_png` but awaits the render pool, or a worker thread without one."""
+    from .render import render_counts_png, render_executor, reset_render_executor
+
+    args = _render_args(df, chart, title, subtitle)
+    with span("render"):
+        pool = render_executor()
+        if pool is not None:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(pool, render_counts_png, *args)
+            except BrokenProcessPool:
+                incr("fallbacks", stage="render_pool")
+                print("[plot_agent] Render pool crashed, restarting it and rendering in-thread")
+                reset_render_executor()
+        return await asyncio.to_thread(render_counts_png, *args)
+
+
+def png_to_image(png: bytes) -> Image.Image:
+    """Wrap encoded PNG bytes as a PIL image, e.g. for Gradio."""
+    from PIL import Image
+
+    return Image.open(io.BytesIO(png))
 
 
 def _plot_counts(df: pd.DataFrame, chart: ChartType, title: str, subtitle: str) -> Image.Image:
-    if df.empty:
-        # Create an empty image with a message
-        fig, ax = plt.subplots(figsize=(8, 4))
-        ax.text(0.5, 0.5, "No data for selected range", ha="center", va="center")
-        ax.axis("off")
-    else:
-        fig, ax = plt.subplots(figsize=(10, 5))
-        dates = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
-        if chart == "bar":
-            width = 0.25
-            x = range(len(dates))
-            ax.bar([i - width for i in x], df["positive"], width=width, label="Positive", color="#4CAF50")
-            ax.bar(x, df["neutral"], width=width, label="Neutral", color="#FFC107")
-            ax.bar([i + width for i in x], df["negative"], width=width, label="Negative", color="#F44336")
-            ax.set_xticks(list(x))
-            ax.set_xticklabels(dates, rotation=45, ha="right")
-        else:
-            ax.plot(dates, df["positive"], marker="o", label="Positive", color="#4CAF50")
-            ax.plot(dates, df["neutral"], marker="o", label="Neutral", color="#FFC107")
-            ax.plot(dates, df["negative"], marker="o", label="Negative", color="#F44336")
-            plt.xticks(rotation=45, ha="right")
-
-        ax.set_title(f"{title}\n{subtitle}")
-        ax.set_xlabel("Date")
-        ax.set_ylabel("Count of Reviews")
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-        plt.tight_layout()
-
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", dpi=160)
-    plt.close(fig)
-    buf.seek(0)
-    return Image.open(buf)
-
-
-def generate_sentiment_plot_from_prompt(user_prompt: str, chart_override: Optional[str] = None):
-    start_date, end_date = parse_date_range(user_prompt)
-    chart, title = _decide_chart_type(user_prompt, chart_override)
-    df = get_sentiment_counts_by_day(start_date, end_date)
-    subtitle = human_range_label(start_date, end_date)
-    image = _plot_counts(df, chart, title, subtitle)
-    return image, df
+    return png_to_image(render_png(df, chart, title, subtitle))
+
+
+def _bucket_from_prompt(user_prompt: str) -> Optional[str]:
+    m = _BUCKET_WORDS.search(user_prompt.lower())
+    if not m:
+        return None
+    word = m.group(1) or m.group(2)
+    return "day" if word == "dai" else word
+
+
+def _keyword_from_prompt(user_prompt: str) -> Tuple[Optional[str], str]:
+    """Split a "... mentioning X ..." clause off the prompt.
+
+    Returns (keyword or None, prompt without the clause) so the remaining
+    text can go to the date range parser.
+    """
+    m = _KEYWORD.search(user_prompt.lower())
+    if not m:
+        return None, user_prompt
+    keyword = next(group for group in m.groups() if group)
+    return keyword.strip(), f"{user_prompt[: m.start()]} {user_prompt[m.end():]}"
+
+
+def resolve_prompt(
+    user_prompt: str, bucket: Optional[str] = None, keyword: Optional[str] = None
+) -> Tuple[date, date, Optional[str], Optional[str]]:
+    """(start, end, bucket, keyword) for a prompt; explicit arguments win over the prompt's wording."""
+    prompt_keyword, date_prompt = _keyword_from_prompt(user_prompt)
+    keyword = (keyword or "").strip() or prompt_keyword
+    start_date, end_date = parse_date_range(date_prompt)
+    if bucket not in BUCKETS:
+        bucket = _bucket_from_prompt(user_prompt)
+    return start_date, end_date, bucket, keyword
+
+
+def _query_counts(
+    start_date: date, end_date: date, bucket: str, keyword: Optional[str] = None
+) -> Tuple[int, pd.DataFrame]:
+    # Read the version before the counts so a concurrent insert can only make
+    # the cached entry look older than it is, never newer
+    version = get_data_version(start_date, end_date)
+    df = get_sentiment_counts(start_date, end_date, bucket, keyword)
+    return version, df
+
+
+def chart_subtitle(start_date: date, end_date: date, bucket: str, keyword: str) -> str:
+    """The line under the chart title: range, bucket when not daily, and keyword."""
+    label = human_range_label(start_date, end_date)
+    if bucket != "day":
+        label = f"{label} · by {bucket}"
+    return f'{label} · mentioning "{keyword}"' if keyword else label
+
+
+def generate_sentiment_plot_from_prompt(
+    user_prompt: str,
+    chart_override: Optional[str] = None,
+    bucket: Optional[str] = None,
+    keyword: Optional[str] = None,
+):
+    """Build the sentiment chart for a free-text date range prompt.
+
+    The prompt is parsed once, then the LLM chart decision runs in the
+    background while the counts are queried; if it takes longer than `PLOT_DECISION_TIMEOUT`
+    seconds the heuristic choice is used instead. Rendering draws onto
+    pre-styled figure templates in the render process pool, and results are
+    cached per (range, bucket, chart, title, data version).
+
+    Counts are grouped into hour/day/week/month buckets: `bucket`, a
+    "weekly"/"by month" phrase in the prompt, or chosen from the range span.
+    `keyword` (or a "mentioning X" phrase in the prompt) restricts the counts
+    to reviews containing it, via the full-text index.
+    """
+    start_date, end_date, bucket, keyword = resolve_prompt(user_prompt, bucket, keyword)
+    bucket = choose_bucket(start_date, end_date, bucket)
+    # Run in a copy of the caller's context so the decision shows up in its timing breakdown
+    decision = _decision_pool.submit(
+        contextvars.copy_context().run, decide_chart_type, user_prompt, start_date, end_date, bucket, chart_override
+    )
+    deadline = time.monotonic() + CHART_DECISION_TIMEOUT
+    try:
+        version, df = _query_counts(start_date, end_date, bucket, keyword)
+    except BaseException:
+        decision.cancel()
+        raise
+    try:
+        chart, title = decision.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        # Drops the decision if it is still queued behind slow ones; a call
+        # already running can't be interrupted and finishes on its own
+        decision.cancel()
+        incr("fallbacks", stage="chart_decision_timeout")
+        chart, title = heuristic_chart(user_prompt)
+
+    bucket, keyword = df.attrs["bucket"], df.attrs["keyword"]
+    key: PlotCacheKey = (start_date, end_date, bucket, keyword.lower(), chart, title, version)
+    cached = _plot_cache_get(key)
+    if cached is not None:
+        png, df = cached
+        return png_to_image(png), df.copy()
+
+    subtitle = chart_subtitle(start_date, end_date, bucket, keyword)
+    png = render_png(df, chart, title, subtitle)
+    _plot_cache_put(key, png, df.copy())
+    return png_to_image(png), df
+
+
+async def generate_sentiment_plot_async(
+    user_prompt: str,
+    chart_override: Optional[str] = None,
+    bucket: Optional[str] = None,
+    keyword: Optional[str] = None,
+):
+    """Async variant of `generate_sentiment_plot_from_prompt`.
+
+    The prompt is parsed and the counts queried in worker threads so the
+    event loop stays free; the chart decision awaits the chain's `ainvoke`
+    meanwhile. A decision slower than `PLOT_DECISION_TIMEOUT` is cancelled.
+    """
+    png, df = await generate_sentiment_plot_png_async(user_prompt, chart_override, bucket, keyword)
+    return png_to_image(png), df
+
+
+async def generate_sentiment_plot_png_async(
+    user_prompt: str,
+    chart_override: Optional[str] = None,
+    bucket: Optional[str] = None,
+    keyword: Optional[str] = None,
+) -> Tuple[bytes, pd.DataFrame]:
+    """Like `generate_sentiment_plot_async` but returns the encoded PNG."""
+    start_date, end_date, bucket, keyword = await asyncio.to_thread(resolve_prompt, user_prompt, bucket, keyword)
+    bucket = choose_bucket(start_date, end_date, bucket)
+    decision = asyncio.ensure_future(
+        decide_chart_type_async(user_prompt, start_date, end_date, bucket, chart_override)
+    )
+    start = time.monotonic()
+    try:
+        version, df = await asyncio.to_thread(_query_counts, start_date, end_date, bucket, keyword)
+    except BaseException:
+        decision.cancel()
+        raise
+    try:
+        remaining = max(0.0, CHART_DECISION_TIMEOUT - (time.monotonic() - start))
+        chart, title = await asyncio.wait_for(decision, timeout=remaining)
+    except asyncio.TimeoutError:
+        incr("fallbacks", stage="chart_decision_timeout")
+        chart, title = heuristic_chart(user_prompt)
+
+    bucket, keyword = df.attrs["bucket"], df.attrs["keyword"]
+    key: PlotCacheKey = (start_date, end_date, bucket, keyword.lower(), chart, title, version)
+    cached = _plot_cache_get(key)
+    if cached is not None:
+        png, df = cached
+        return png, df.copy()
 
+    subtitle = chart_subtitle(start_date, end_date, bucket, keyword)
+    png = await render_png_async(df, chart, title, subtitle)
+    _plot_cache_put(key, png, df.copy())
+    return png, df
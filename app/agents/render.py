@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Optional, Sequence
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+
+
+DPI = 160
+SERIES = (
+    ("Positive", "#4CAF50"),
+    ("Neutral", "#FFC107"),
+    ("Negative", "#F44336"),
+)
+BAR_WIDTH = 0.25
+# Tick labels shown at most; longer series label every n-th point
+MAX_TICK_LABELS = 31
+AXIS_LABELS = {"hour": "Hour", "day": "Date", "week": "Week starting", "month": "Month"}
+
+# Render processes; 0 renders in the calling thread
+RENDER_WORKERS = int(os.getenv("PLOT_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+class _ChartTemplate:
+    """A styled figure that is reused for every render of one chart type.
+
+    Axes labels, grid, legend and margins are set up once; each render only
+    adds the data artists, encodes the PNG and removes them again. Templates
+    are per thread, so no matplotlib state is shared between renders.
+    """
+
+    def __init__(self, chart: str) -> None:
+        self.chart = chart
+        self.fig = Figure(figsize=(10, 5), dpi=DPI)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        self.ax.set_xlabel("Date")
+        self.ax.set_ylabel("Count of Reviews")
+        self.ax.grid(True, alpha=0.3)
+        if chart == "bar":
+            handles = [Patch(color=color, label=label) for label, color in SERIES]
+        else:
+            handles = [Line2D([], [], marker="o", color=color, label=label) for label, color in SERIES]
+        self.ax.legend(handles=handles)
+        # Fixed margins leave room for the two-line title and rotated tick labels
+        self.fig.subplots_adjust(left=0.07, right=0.98, top=0.88, bottom=0.24)
+
+    def render(
+        self, labels: Sequence[str], series: Sequence[Sequence[int]], title: str, subtitle: str, bucket: str
+    ) -> bytes:
+        ax = self.ax
+        x = list(range(len(labels)))
+        step = -(-len(labels) // MAX_TICK_LABELS)
+        try:
+            for offset, values, (label, color) in zip((-BAR_WIDTH, 0.0, BAR_WIDTH), series, SERIES):
+                if self.chart == "bar":
+                    ax.bar([i + offset for i in x], values, width=BAR_WIDTH, label=label, color=color)
+                else:
+                    ax.plot(x, values, marker="o" if len(x) <= 120 else None, label=label, color=color)
+            ax.set_xticks(x[::step])
+            ax.set_xticklabels(labels[::step], rotation=45, ha="right")
+            ax.set_xlabel(AXIS_LABELS.get(bucket, "Date"))
+            ax.set_title(f"{title}\n{subtitle}")
+            ax.relim()
+            ax.autoscale_view()
+            buf = io.BytesIO()
+            self.fig.savefig(buf, format="png")
+            return buf.getvalue()
+        finally:
+            for container in list(ax.containers):
+                container.remove()
+            for line in list(ax.lines):
+                line.remove()
+
+
+_local = threading.local()
+
+
+def _template(chart: str) -> _ChartTemplate:
+    templates: Optional[Dict[str, _ChartTemplate]] = getattr(_local, "templates", None)
+    if templates is None:
+        templates = _local.templates = {}
+    template = templates.get(chart)
+    if template is None:
+        template = templates[chart] = _ChartTemplate(chart)
+    return template
+
+
+@lru_cache(maxsize=1)
+def _empty_png() -> bytes:
+    fig = Figure(figsize=(8, 4), dpi=DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.text(0.5, 0.5, "No data for selected range", ha="center", va="center")
+    ax.axis("off")
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def render_counts_png(
+    labels: Sequence[str],
+    positive: Sequence[int],
+    neutral: Sequence[int],
+    negative: Sequence[int],
+    chart: str,
+    title: str,
+    subtitle: str,
+    bucket: str = "day",
+) -> bytes:
+    """Render sentiment counts to PNG bytes. Safe to call from any thread or process.
+
+    `labels` are the preformatted bucket names; `bucket` only sets the axis label.
+    """
+    if not labels:
+        return _empty_png()
+    chart = "bar" if chart == "bar" else "line"
+    return _template(chart).render(list(labels), (positive, neutral, negative), title, subtitle, bucket)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def render_executor() -> Optional[ProcessPoolExecutor]:
+    """Return the shared render process pool, or None to render in-thread."""
+    global _pool
+    if RENDER_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawn rather than fork: the parent runs server and DB threads
+                _pool = ProcessPoolExecutor(
+                    max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def reset_render_executor() -> None:
+    """Shut the pool down; the next `render_executor` call starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
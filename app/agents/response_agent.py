@@ -1,33 +1,63 @@
 from __future__ import annotations
 
-from typing import Literal, Optional, Tuple
+import asyncio
+import os
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from pydantic import BaseModel, Field
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from .llm_provider import get_chain, llm_model_name
+from .router import route_review, route_reviews
+from .sentiment import SentimentLabel, get_scorer
+from ..data.cache import (
+    get_cached_response,
+    make_cache_key,
+    put_cached_response,
+    response_cache_enabled,
+)
+from ..data.db import insert_reviews
+from ..data.writer import persist_review
+from ..utils.metrics import incr, span
 
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.prompts import ChatPromptTemplate
 
-from .llm_provider import get_llm, llm_available
-from ..data.db import insert_review
+# Bump whenever the response prompt changes so stale cached replies are not reused
+PROMPT_VERSION = "1"
 
 
-SentimentLabel = Literal["positive", "neutral", "negative"]
+_SYSTEM_PROMPT = (
+    "You are a helpful customer support agent for SteamNoodles (a modern restaurant). "
+    "Determine the sentiment as one of: positive, neutral, negative. "
+    "Then craft a short, polite, context-aware reply. Be concise (<= 2 sentences). "
+    "Return JSON only following the provided schema."
+)
 
 
-class ResponseSchema(BaseModel):
-    sentiment: SentimentLabel = Field(description="The sentiment of the review")
-    reply: str = Field(description="Short, polite, context-aware reply to the customer")
+# pydantic and langchain_core are imported on first use to keep startup fast
+@lru_cache(maxsize=None)
+def _response_schema() -> Any:
+    from pydantic import BaseModel, Field
+
+    class ResponseSchema(BaseModel):
+        sentiment: SentimentLabel = Field(description="The sentiment of the review")
+        reply: str = Field(description="Short, polite, context-aware reply to the customer")
+
+    return ResponseSchema
+
+
+def __getattr__(name: str) -> Any:
+    if name == "ResponseSchema":
+        return _response_schema()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def _rule_based_sentiment(text: str) -> SentimentLabel:
-    analyzer = SentimentIntensityAnalyzer()
-    score = analyzer.polarity_scores(text)["compound"]
-    if score >= 0.2:
-        return "positive"
-    if score <= -0.2:
-        return "negative"
-    return "neutral"
+    return get_scorer().label(text)
+
+
+@span("vader")
+def _fallback_response(text: str) -> Tuple[SentimentLabel, str]:
+    sentiment = _rule_based_sentiment(text)
+    return sentiment, _templated_reply(text, sentiment)
 
 
 def _templated_reply(text: str, sentiment: SentimentLabel) -> str:
@@ -46,49 +76,258 @@ def _templated_reply(text: str, sentiment: SentimentLabel) -> str:
     )
 
 
-def analyze_and_respond(feedback_text: str) -> Tuple[SentimentLabel, str]:
-    """Analyze sentiment and generate an automated reply. Saves the review to DB.
+def _build_response_chain(llm):
+    from langchain_core.output_parsers import JsonOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
 
-    Uses an LLM via LangChain when available. Falls back to a local rule-based
-    classifier and templated replies for offline demo.
-    """
+    parser = JsonOutputParser(pydantic_object=_response_schema())
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", _SYSTEM_PROMPT),
+            ("human", "Customer review: {review}"),
+        ]
+    ).partial()
+    return prompt | llm | parser
+
+
+@span("parse")
+def _parse_response(result) -> Tuple[SentimentLabel, str]:
+    # Ensure we have a ResponseSchema instance even if parser returns a dict
+    if isinstance(result, dict):
+        parsed = _response_schema()(**result)
+    else:
+        parsed = result  # type: ignore
+    return parsed.sentiment, parsed.reply.strip()
+
+
+def _cache_key(text: str, use_cache: bool) -> Optional[str]:
+    if not use_cache or not response_cache_enabled():
+        return None
+    return make_cache_key(text, llm_model_name(), PROMPT_VERSION)
+
+
+def _review_text(feedback_text: str) -> str:
     text = feedback_text.strip()
     if not text:
         raise ValueError("Feedback text is empty.")
+    return text
+
+
+Answer = Tuple[SentimentLabel, str]
+
+
+def _lookup(text: str, use_cache: bool, routed: Optional[Answer]) -> Tuple[Optional[str], Optional[Answer]]:
+    """(cache key, answer) for a review given its routing; the answer is None if the LLM must be asked."""
+    if routed is not None:
+        return None, routed
+    key = _cache_key(text, use_cache)
+    cached = get_cached_response(key) if key else None
+    return key, cached  # type: ignore[return-value]
+
+
+def _route_or_cached(text: str, use_cache: bool) -> Tuple[Any, Optional[str], Optional[Answer]]:
+    """(chain, cache key, answer) before any LLM call.
+
+    The answer is already set when no LLM is configured (rule-based), the
+    router is confident or the reply is cached; otherwise the caller runs
+    the chain and hands its output to `_finish`.
+    """
+    chain = get_chain("response", _build_response_chain)
+    if chain is None:
+        return None, None, _fallback_response(text)
+    return (chain, *_lookup(text, use_cache, route_review(text)))
+
+
+def _finish(text: str, key: Optional[str], output: Any, count: int = 1) -> Answer:
+    """Parse the chain's `output` for `text` and cache it under `key`.
+
+    `output` may also be the exception the call raised; that or an output
+    that does not parse falls back to the rule-based answer. `count` is the
+    number of reviews sharing this output, for the fallback counter.
+    """
+    try:
+        if isinstance(output, Exception):
+            raise output
+        sentiment, reply = _parse_response(output)
+    except Exception:
+        incr("fallbacks", stage="response", amount=count)
+        return _fallback_response(text)
+    if key:
+        put_cached_response(key, sentiment, reply)
+    return sentiment, reply
+
+
+def analyze_and_respond(feedback_text: str, use_cache: bool = True) -> Tuple[SentimentLabel, str]:
+    """Analyze sentiment and generate an automated reply. Saves the review to DB.
 
-    if llm_available():
-        llm = get_llm()
-        parser = JsonOutputParser(pydantic_object=ResponseSchema)
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "You are a helpful customer support agent for SteamNoodles (a modern restaurant). "
-                    "Determine the sentiment as one of: positive, neutral, negative. "
-                    "Then craft a short, polite, context-aware reply. Be concise (<= 2 sentences). "
-                    "Return JSON only following the provided schema.",
-                ),
-                ("human", "Customer review: {review}"),
-            ]
-        ).partial()
-        chain = prompt | llm | parser
+    Uses an LLM via LangChain when available. Reviews whose VADER score is
+    beyond `ROUTER_THRESHOLD` are answered locally from a reply pool instead
+    (see router.py). Falls back to a local rule-based classifier and
+    templated replies for offline demo. Successful LLM replies are cached by
+    normalized review text; pass `use_cache=False` to bypass. With
+    `REVIEW_WRITE_MODE=async` the review is queued for the background writer
+    instead of being written before returning.
+    """
+    text = _review_text(feedback_text)
+    chain, key, answer = _route_or_cached(text, use_cache)
+    if answer is None:
+        try:
+            with span("llm"):
+                output = chain.invoke({"review": text})
+        except Exception as e:
+            output = e
+        answer = _finish(text, key, output)
+    persist_review(text, answer[0])
+    return answer
+
+
+async def analyze_and_respond_async(feedback_text: str, use_cache: bool = True) -> Tuple[SentimentLabel, str]:
+    """Async variant of `analyze_and_respond`.
+
+    Awaits the chain's `ainvoke` so no thread is held during the LLM call;
+    routing, cache access and the DB insert run in worker threads off the
+    event loop.
+    """
+    text = _review_text(feedback_text)
+    chain, key, answer = await asyncio.to_thread(_route_or_cached, text, use_cache)
+    if answer is None:
+        try:
+            with span("llm"):
+                output = await chain.ainvoke({"review": text})
+        except Exception as e:
+            output = e
+        answer = await asyncio.to_thread(_finish, text, key, output)
+    await asyncio.to_thread(persist_review, text, answer[0])
+    return answer
+
+
+_LABELS = {"positive", "neutral", "negative"}
+
+
+def _partial_update(chunk: Any) -> Tuple[Optional[SentimentLabel], str]:
+    """Read (sentiment, reply so far) out of a partial JSON object from the parser.
+
+    The sentiment is only reported once it is a complete label; no label is a
+    prefix of another, so a matching value can no longer change.
+    """
+    if not isinstance(chunk, dict):
+        return None, ""
+    sentiment = chunk.get("sentiment")
+    reply = chunk.get("reply")
+    return (
+        sentiment if sentiment in _LABELS else None,  # type: ignore[return-value]
+        reply if isinstance(reply, str) else "",
+    )
+
+
+def analyze_and_respond_stream(
+    feedback_text: str, use_cache: bool = True
+) -> Iterator[Tuple[Optional[SentimentLabel], str]]:
+    """Streaming variant of `analyze_and_respond`.
+
+    Yields (sentiment, reply so far) as the LLM generates its JSON; sentiment
+    is None until that field has fully arrived. The last item is the final
+    result, which is also cached and saved to the DB. Locally routed
+    reviews, cache hits and the offline fallback yield a single item.
+    """
+    text = _review_text(feedback_text)
+    chain, key, answer = _route_or_cached(text, use_cache)
+    if answer is None:
+        output: Any = None
+        shown: Tuple[Optional[SentimentLabel], str] = (None, "")
         try:
-            result = chain.invoke({"review": text})
-            # Ensure we have a ResponseSchema instance even if parser returns a dict
-            if isinstance(result, dict):
-                parsed = ResponseSchema(**result)
+            with span("llm"):
+                for chunk in chain.stream({"review": text}):
+                    output = chunk
+                    update = _partial_update(chunk)
+                    if update != shown:
+                        shown = update
+                        yield update
+        except Exception as e:
+            output = e
+        answer = _finish(text, key, output)
+    persist_review(text, answer[0])
+    yield answer
+
+
+async def analyze_and_respond_stream_async(
+    feedback_text: str, use_cache: bool = True
+) -> AsyncIterator[Tuple[Optional[SentimentLabel], str]]:
+    """Async variant of `analyze_and_respond_stream` built on the chain's `astream`."""
+    text = _review_text(feedback_text)
+    chain, key, answer = await asyncio.to_thread(_route_or_cached, text, use_cache)
+    if answer is None:
+        output: Any = None
+        shown: Tuple[Optional[SentimentLabel], str] = (None, "")
+        try:
+            with span("llm"):
+                async for chunk in chain.astream({"review": text}):
+                    output = chunk
+                    update = _partial_update(chunk)
+                    if update != shown:
+                        shown = update
+                        yield update
+        except Exception as e:
+            output = e
+        answer = await asyncio.to_thread(_finish, text, key, output)
+    await asyncio.to_thread(persist_review, text, answer[0])
+    yield answer
+
+
+def analyze_and_respond_batch(
+    feedback_texts: Sequence[str],
+    created_at: Optional[Sequence[Optional[datetime]]] = None,
+    use_cache: bool = True,
+) -> List[Tuple[SentimentLabel, str]]:
+    """Analyze and reply to many reviews at once. Saves them in one transaction.
+
+    LLM requests go through the chain's `batch` (up to `LLM_BATCH_CONCURRENCY`
+    in flight); any item that fails falls back to the rule-based classifier on
+    its own. Clear-cut reviews are answered locally (see router.py) and
+    cached replies are reused, so only the rest reach the LLM.
+    `created_at`, when given, must line up with `feedback_texts`.
+    """
+    texts = [t.strip() for t in feedback_texts]
+    for i, text in enumerate(texts):
+        if not text:
+            raise ValueError(f"Feedback text at index {i} is empty.")
+    if created_at is not None and len(created_at) != len(texts):
+        raise ValueError("created_at must have the same length as feedback_texts.")
+    if not texts:
+        return []
+
+    results: Dict[int, Tuple[SentimentLabel, str]] = {}
+    chain = get_chain("response", _build_response_chain)
+    if chain is not None:
+        keys: Dict[int, Optional[str]] = {}
+        # Duplicate reviews in one batch share a single LLM request
+        pending: Dict[str, List[int]] = {}
+        for i, (text, routed) in enumerate(zip(texts, route_reviews(texts))):
+            keys[i], answer = _lookup(text, use_cache, routed)
+            if answer is not None:
+                results[i] = answer
             else:
-                parsed = result  # type: ignore
-            sentiment = parsed.sentiment
-            reply = parsed.reply.strip()
-        except Exception:
-            # Robust fallback if LLM or parsing fails
-            sentiment = _rule_based_sentiment(text)
-            reply = _templated_reply(text, sentiment)
+                pending.setdefault(keys[i] or f"#{i}", []).append(i)
+        groups = list(pending.values())
+        max_concurrency = int(os.getenv("LLM_BATCH_CONCURRENCY", "8"))
+        with span("llm"):
+            outputs = chain.batch(
+                [{"review": texts[group[0]]} for group in groups],
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True,
+            ) if groups else []
+        for group, output in zip(groups, outputs):
+            answer = _finish(texts[group[0]], keys[group[0]], output, count=len(group))
+            for i in group:
+                results[i] = answer
     else:
-        sentiment = _rule_based_sentiment(text)
-        reply = _templated_reply(text, sentiment)
-
-    insert_review(text, sentiment)
-    return sentiment, reply
+        labels = get_scorer().label_batch(texts)
+        for i, (text, sentiment) in enumerate(zip(texts, labels)):
+            results[i] = (sentiment, _templated_reply(text, sentiment))
 
+    ordered = [results[i] for i in range(len(texts))]
+    timestamps = created_at if created_at is not None else [None] * len(texts)
+    insert_reviews(
+        (text, sentiment, ts) for text, (sentiment, _), ts in zip(texts, ordered, timestamps)
+    )
+    return ordered
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import os
+import re
+import zlib
+from datetime import date
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from ..data.cache import normalize_review
+from ..utils.metrics import counter_values, incr, register_stats, span
+from .sentiment import SentimentLabel, get_scorer
+
+if TYPE_CHECKING:
+    from .plot_agent import ChartType
+
+
+# Answer clear-cut requests locally instead of calling the LLM
+ROUTER_ENABLED = os.getenv("ROUTER", "true").lower() not in {"0", "false", "no"}
+# Minimum |VADER compound| for a review to be answered without the LLM
+ROUTER_THRESHOLD = float(os.getenv("ROUTER_THRESHOLD", "0.7"))
+# Charts with at most this many points default to bars, longer series to lines
+ROUTER_BAR_MAX_POINTS = int(os.getenv("ROUTER_BAR_MAX_POINTS", "12"))
+
+
+# Reply pools; the pick is a hash of the review so the same review always
+# gets the same reply. "{topic}" is filled with what the review talks about.
+_REPLIES: Dict[str, Tuple[str, ...]] = {
+    "positive": (
+        "Thanks for the wonderful feedback! We're thrilled you enjoyed your experience at SteamNoodles. "
+        "We hope to welcome you back soon!",
+        "Thank you so much! Reviews like yours make our kitchen's day. See you again soon!",
+        "We're so glad you had a great time at SteamNoodles. Thanks for taking the time to tell us!",
+        "That's lovely to hear, thank you! We look forward to serving you again.",
+    ),
+    "negative": (
+        "We're sorry to hear about your experience. Thank you for letting us know—our team will review this "
+        "and work to make things right. We hope you'll give us another chance.",
+        "We apologize that your visit fell short. Your feedback has been passed to our team so we can fix it.",
+        "Thank you for telling us, and we're sorry we let you down. We'd love the chance to do better next time.",
+        "We're sorry this wasn't the experience you deserve. We're looking into it and hope to see you again.",
+    ),
+}
+_TOPIC_REPLIES: Dict[str, Tuple[str, ...]] = {
+    "positive": (
+        "Thank you for the kind words about {topic}! We'll pass them on to the team and hope to see you soon.",
+        "So happy you enjoyed {topic}! Thanks for visiting SteamNoodles, we hope you'll be back soon.",
+    ),
+    "negative": (
+        "We're sorry about {topic}. Thank you for letting us know—our team will look into it right away.",
+        "We apologize that {topic} didn't meet your expectations. We're working on it and hope you'll give us "
+        "another chance.",
+    ),
+}
+_TOPICS = re.compile(
+    r"\b(ramen|broth|noodles|dumplings|gyoza|tonkotsu|dessert|service|staff|ambiance|portions|wait(?:ing)? time)\b"
+)
+
+# Words a plain date-range chart request is made of; anything else sends
+# the prompt to the LLM
+_DATE_WORDS = frozenset(
+    """
+    jan january feb february mar march apr april may jun june jul july aug august sep sept september oct october
+    nov november dec december mon monday tue tues tuesday wed wednesday thu thur thurs thursday fri friday sat
+    saturday sun sunday today yesterday tomorrow now last past previous this next current day days week weeks
+    month months year years hour hours weekend ago from to since until till through thru between and the of on in
+    st nd rd th a an few couple one two three four five six seven eight nine ten eleven twelve so far date
+    """.split()
+)
+_FILLER_WORDS = frozenset(
+    """
+    show me plot chart graph visualize visualise display draw give get make create see view please can could you
+    i want would like sentiment sentiments trend trends review reviews feedback customer customers for over
+    during across per by each hourly daily weekly monthly with what how was were is are our my all overview
+    summary us
+    """.split()
+)
+_BAR_WORDS = frozenset(
+    "bar bars column columns histogram compare comparison breakdown totals total count counts".split()
+)
+_LINE_WORDS = frozenset("line lines timeline evolution progression progress time".split())
+_BUCKET_TITLES = {"hour": "Hourly", "day": "Daily", "week": "Weekly", "month": "Monthly"}
+
+
+def _reply(text: str, sentiment: SentimentLabel) -> str:
+    pick = zlib.crc32(normalize_review(text).encode("utf-8"))
+    match = _TOPICS.search(text.lower())
+    if match:
+        pool = _TOPIC_REPLIES[sentiment]
+        return pool[pick % len(pool)].format(topic=f"the {match.group(1)}")
+    pool = _REPLIES[sentiment]
+    return pool[pick % len(pool)]
+
+
+def _route_score(text: str, score: float) -> Optional[Tuple[SentimentLabel, str]]:
+    if abs(score) < ROUTER_THRESHOLD:
+        incr("routed", task="review", route="llm")
+        return None
+    incr("routed", task="review", route="local")
+    sentiment: SentimentLabel = "positive" if score > 0 else "negative"
+    return sentiment, _reply(text, sentiment)
+
+
+def route_review(text: str) -> Optional[Tuple[SentimentLabel, str]]:
+    """(sentiment, reply) when VADER is confident enough, else None to ask the LLM."""
+    if not ROUTER_ENABLED:
+        return None
+    with span("vader"):
+        score = get_scorer().compound(text)
+    return _route_score(text, score)
+
+
+def route_reviews(texts: Sequence[str]) -> List[Optional[Tuple[SentimentLabel, str]]]:
+    """`route_review` over a batch, scoring each distinct text once."""
+    if not ROUTER_ENABLED:
+        return [None] * len(texts)
+    with span("vader"):
+        scores = get_scorer().compound_batch(texts)
+    return [_route_score(text, score) for text, score in zip(texts, scores)]
+
+
+def _points(start_date: date, end_date: date, bucket: str) -> int:
+    days = (end_date - start_date).days + 1
+    return {"hour": days * 24, "day": days, "week": -(-days // 7), "month": -(-days // 30)}[bucket]
+
+
+def _range_title(start_date: date, end_date: date) -> str:
+    if start_date == end_date:
+        return start_date.strftime("%b %d, %Y")
+    if start_date.year == end_date.year:
+        return f"{start_date.strftime('%b %d')} – {end_date.strftime('%b %d, %Y')}"
+    return f"{start_date.strftime('%b %Y')} – {end_date.strftime('%b %Y')}"
+
+
+def route_chart(
+    date_prompt: str, start_date: date, end_date: date, bucket: str
+) -> Optional[Tuple[ChartType, str]]:
+    """Chart type and title for a prompt that only names a date range (and
+    optionally a chart style), else None to ask the LLM.
+
+    `date_prompt` is the prompt without its keyword clause; the range and
+    bucket are the ones the counts will use.
+    """
+    if not ROUTER_ENABLED:
+        return None
+    words = re.findall(r"[a-z]+", date_prompt.lower())
+    unknown = [w for w in words if w not in _DATE_WORDS and w not in _FILLER_WORDS]
+    bar = any(w in _BAR_WORDS for w in unknown)
+    line = any(w in _LINE_WORDS for w in unknown)
+    if bar and line or any(w not in _BAR_WORDS and w not in _LINE_WORDS for w in unknown):
+        incr("routed", task="chart", route="llm")
+        return None
+    incr("routed", task="chart", route="local")
+    if not bar and not line:
+        bar = _points(start_date, end_date, bucket) <= ROUTER_BAR_MAX_POINTS
+    title = f"{_BUCKET_TITLES[bucket]} review sentiment, {_range_title(start_date, end_date)}"
+    return ("bar" if bar else "line"), title
+
+
+def router_stats() -> Dict[str, float]:
+    """Share of reviews and charts answered locally, for tuning ROUTER_THRESHOLD."""
+    totals: Dict[str, Dict[str, float]] = {}
+    for (name, labels), value in counter_values().items():
+        if name == "routed":
+            label = dict(labels)
+            totals.setdefault(label["task"], {}).setdefault(label["route"], 0.0)
+            totals[label["task"]][label["route"]] += value
+    stats: Dict[str, float] = {}
+    for task, routes in totals.items():
+        total = sum(routes.values())
+        stats[f"{task}_local_ratio"] = routes.get("local", 0.0) / total if total else 0.0
+    return stats
+
+
+register_stats("router", router_stats)
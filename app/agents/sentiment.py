@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import codecs
+import os
+import threading
+from typing import Dict, FrozenSet, List, Literal, Optional, Sequence
+
+from vaderSentiment import vaderSentiment as vader
+
+
+SentimentLabel = Literal["positive", "neutral", "negative"]
+
+# Compound score thresholds for the rule-based labels
+POSITIVE_THRESHOLD = 0.2
+NEGATIVE_THRESHOLD = -0.2
+
+
+def _read_table(filename: str) -> Dict[str, str]:
+    path = os.path.join(os.path.dirname(os.path.abspath(vader.__file__)), filename)
+    table: Dict[str, str] = {}
+    with codecs.open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            key, value = line.split("\t")[0:2]
+            table[key] = value
+    return table
+
+
+class SentimentScorer(vader.SentimentIntensityAnalyzer):
+    """VADER analyzer that is built once and reused for every review.
+
+    The lexicon and emoji tables are parsed straight into dicts (without
+    keeping the raw file text around like the stock analyzer does), and texts
+    without emoji skip VADER's per-character emoji rewrite. Scores are
+    identical to `SentimentIntensityAnalyzer.polarity_scores`.
+    """
+
+    def __init__(self) -> None:
+        self.lexicon = {word: float(measure) for word, measure in _read_table("vader_lexicon.txt").items()}
+        self.emojis = _read_table("emoji_utf8_lexicon.txt")
+        self._emoji_chars: FrozenSet[str] = frozenset(self.emojis)
+
+    def polarity_scores(self, text: str) -> Dict[str, float]:
+        if not self._emoji_chars.intersection(text):
+            return self._score_plain(text.strip())
+        return super().polarity_scores(text)
+
+    def _score_plain(self, text: str) -> Dict[str, float]:
+        # Mirrors the stock polarity_scores once emoji have been described
+        sentitext = vader.SentiText(text)
+        sentiments: List[float] = []
+        words_and_emoticons = sentitext.words_and_emoticons
+        for i, item in enumerate(words_and_emoticons):
+            valence = 0
+            if item.lower() in vader.BOOSTER_DICT:
+                sentiments.append(valence)
+                continue
+            if (i < len(words_and_emoticons) - 1 and item.lower() == "kind" and
+                    words_and_emoticons[i + 1].lower() == "of"):
+                sentiments.append(valence)
+                continue
+            sentiments = self.sentiment_valence(valence, sentitext, item, i, sentiments)
+        sentiments = self._but_check(words_and_emoticons, sentiments)
+        return self.score_valence(sentiments, text)
+
+    def compound(self, text: str) -> float:
+        return self.polarity_scores(text)["compound"]
+
+    def compound_batch(self, texts: Sequence[str]) -> List[float]:
+        """Score many texts, computing each distinct text only once."""
+        scores: Dict[str, float] = {}
+        for text in texts:
+            if text not in scores:
+                scores[text] = self.compound(text)
+        return [scores[text] for text in texts]
+
+    def label(self, text: str) -> SentimentLabel:
+        return label_from_score(self.compound(text))
+
+    def label_batch(self, texts: Sequence[str]) -> List[SentimentLabel]:
+        return [label_from_score(score) for score in self.compound_batch(texts)]
+
+
+_scorer: Optional[SentimentScorer] = None
+_scorer_lock = threading.Lock()
+
+
+def get_scorer() -> SentimentScorer:
+    """Return the process-wide scorer, loading the lexicon on first use."""
+    global _scorer
+    if _scorer is None:
+        with _scorer_lock:
+            if _scorer is None:
+                _scorer = SentimentScorer()
+    return _scorer
+
+
+def label_from_score(score: float) -> SentimentLabel:
+    if score >= POSITIVE_THRESHOLD:
+        return "positive"
+    if score <= NEGATIVE_THRESHOLD:
+        return "negative"
+    return "neutral"
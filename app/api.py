@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+
+from .agents.plot_agent import ChartType, resolve_prompt, generate_sentiment_plot_png_async
+from .agents.response_agent import analyze_and_respond_async, analyze_and_respond_batch
+from .data.db import Bucket, get_sentiment_counts
+from .utils.metrics import span
+
+
+# Max API requests handled at once per worker process; the rest wait their turn
+API_CONCURRENCY = int(os.getenv("API_CONCURRENCY", "64"))
+# Largest accepted /api/analyze/batch request
+API_BATCH_MAX = int(os.getenv("API_BATCH_MAX", "1000"))
+
+router = APIRouter(prefix="/api")
+_slots = asyncio.Semaphore(API_CONCURRENCY)
+
+
+class AnalyzeRequest(BaseModel):
+    text: str
+    use_cache: bool = True
+
+
+class AnalyzeResult(BaseModel):
+    sentiment: str
+    reply: str
+
+
+class BatchRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1)
+    use_cache: bool = True
+
+
+class BatchResult(BaseModel):
+    results: List[AnalyzeResult]
+
+
+@router.get("/health")
+async def health() -> Dict[str, str]:
+    return {"status": "ok"}
+
+
+@router.post("/analyze")
+async def analyze(request: AnalyzeRequest) -> AnalyzeResult:
+    """Classify one review and draft a reply; the review is stored like a UI submission."""
+    async with _slots:
+        with span("api_analyze"):
+            try:
+                sentiment, reply = await analyze_and_respond_async(request.text, request.use_cache)
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+    return AnalyzeResult(sentiment=sentiment, reply=reply)
+
+
+@router.post("/analyze/batch")
+async def analyze_batch(request: BatchRequest) -> BatchResult:
+    """Analyze many reviews in one call; results keep the request order."""
+    if len(request.texts) > API_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {API_BATCH_MAX} texts per batch.")
+    async with _slots:
+        with span("api_analyze_batch"):
+            try:
+                pairs = await asyncio.to_thread(
+                    analyze_and_respond_batch, request.texts, use_cache=request.use_cache
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+    return BatchResult(results=[AnalyzeResult(sentiment=s, reply=r) for s, r in pairs])
+
+
+@router.get("/counts")
+async def counts(
+    prompt: str = "last 7 days",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bucket: Optional[Bucket] = None,
+    keyword: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Sentiment counts per period, for a date-range prompt or explicit start/end dates."""
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=422, detail="start must not be after end.")
+    async with _slots:
+        with span("api_counts"):
+            # Prompts that miss the fast path go through dateparser, which would block the loop
+            start_date, end_date, bucket, keyword = await asyncio.to_thread(
+                resolve_prompt, prompt, bucket, keyword
+            )
+            if start is not None or end is not None:
+                start_date, end_date = start or end, end or start
+            df = await asyncio.to_thread(get_sentiment_counts, start_date, end_date, bucket, keyword)
+    return {
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "bucket": df.attrs["bucket"],
+        "keyword": df.attrs["keyword"],
+        "counts": [
+            {"period": period.isoformat(), "positive": int(pos), "neutral": int(neu), "negative": int(neg)}
+            for period, pos, neu, neg in df[["date", "positive", "neutral", "negative"]].itertuples(index=False)
+        ],
+    }
+
+
+@router.get("/plot.png", response_class=Response)
+async def plot_png(
+    prompt: str = "last 7 days",
+    chart: Optional[ChartType] = None,
+    bucket: Optional[Bucket] = None,
+    keyword: Optional[str] = None,
+):
+    """The Sentiment Trends chart for a prompt, as a PNG."""
+    async with _slots:
+        with span("api_plot"):
+            png, _ = await generate_sentiment_plot_png_async(prompt, chart, bucket, keyword)
+    return Response(png, media_type="image/png")
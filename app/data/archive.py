@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from ..utils.metrics import incr, span
+from . import db
+
+
+# Most recent calendar months (including the current one) kept in SQLite
+ARCHIVE_KEEP_MONTHS = int(os.getenv("ARCHIVE_KEEP_MONTHS", "3"))
+# Where the monthly Parquet files go; defaults to <db name>_archive/ next to the database
+ARCHIVE_DIR = os.getenv("REVIEW_ARCHIVE_DIR")
+ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", "zstd")
+# Per-partition count results kept in memory; archived months never change
+ARCHIVE_CACHE_SIZE = int(os.getenv("ARCHIVE_CACHE_SIZE", "512"))
+# Seconds a replaced partition file is kept for readers still holding the old catalog entry
+ARCHIVE_GRACE_SECONDS = float(os.getenv("ARCHIVE_GRACE_SECONDS", "3600"))
+
+_LABELS = ("positive", "neutral", "negative")
+# Length of the created_at prefix that `db._BUCKET_SQL` groups on
+_KEY_LENGTHS = {"hour": 13, "day": 10, "week": 10, "month": 7}
+# Partition files (and their in-progress copies) that archive_month writes
+_PARTITION_FILE = re.compile(r"reviews-\d{4}-\d{2}\.\d+\.parquet(\.tmp)?")
+
+
+def archive_dir() -> str:
+    return os.path.abspath(ARCHIVE_DIR or f"{os.path.splitext(db.DB_PATH)[0]}_archive")
+
+
+def _parquet() -> Any:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Review archival needs pyarrow (pip install pyarrow).") from e
+    return pq
+
+
+def _month_bounds(month: str) -> Tuple[str, str]:
+    """ISO bounds usable with BETWEEN, like `db._range_bounds`; day 31 sorts after every real day."""
+    return f"{month}-01T00:00:00", f"{month}-31T23:59:59.999999"
+
+
+def _index_terms(texts: Sequence[str]) -> Optional[List[str]]:
+    """Each text's distinct FTS index terms, space separated and space padded.
+
+    SQLite tokenizes them in a scratch FTS5 table with the `reviews_fts`
+    tokenizer, so archived keyword matches stem and fold exactly like live
+    ones. None if this SQLite lacks FTS5.
+    """
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute(f"CREATE VIRTUAL TABLE scratch USING fts5(text, tokenize='{db._FTS_TOKENIZE}')")
+        conn.executemany("INSERT INTO scratch (rowid, text) VALUES (?, ?)", enumerate(texts, 1))
+        conn.execute("CREATE VIRTUAL TABLE scratch_terms USING fts5vocab(scratch, 'instance')")
+        found: List[Set[str]] = [set() for _ in texts]
+        for doc, term in conn.execute("SELECT doc, term FROM scratch_terms"):
+            found[doc - 1].add(term)
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    return [f" {' '.join(sorted(terms))} " for terms in found]
+
+
+def _read_partition(
+    path: str,
+    columns: Sequence[str],
+    start_iso: str,
+    end_iso: str,
+    keyword: Optional[str] = None,
+    id_range: Optional[Tuple[int, int]] = None,
+    sentiment: Optional[str] = None,
+) -> Any:
+    import pyarrow.compute as pc
+
+    pq = _parquet()
+    full_path = os.path.join(archive_dir(), path)
+    filters: List[Tuple[str, str, Any]] = [("created_at", ">=", start_iso), ("created_at", "<=", end_iso)]
+    if id_range is not None:
+        filters += [("id", ">", id_range[0]), ("id", "<=", id_range[1])]
+    if sentiment:
+        filters.append(("sentiment", "=", sentiment))
+    if not keyword or not keyword.strip():
+        return pq.read_table(full_path, columns=list(columns), filters=filters)
+    if db.fts_available():
+        # Same semantics as the MATCH on the live table: every query term
+        # among the row's index terms
+        terms = (_index_terms([keyword]) or [""])[0].split()
+        stored = "terms" in pq.read_schema(full_path).names
+        needed = list(dict.fromkeys([*columns, "terms" if stored else "text"]))
+        table = pq.read_table(full_path, columns=needed, filters=filters)
+        if not terms:
+            return table.slice(0, 0)
+        if not stored:
+            # Files written before the terms column existed
+            import pyarrow as pa
+
+            table = table.append_column("terms", pa.array(_index_terms(table["text"].to_pylist()), pa.string()))
+        for term in terms:
+            table = table.filter(pc.match_substring(table["terms"], f" {term} "))
+        return table
+    # Like the live table without FTS5: a substring match per word
+    words = re.findall(r"\w+", keyword.lower())
+    table = pq.read_table(full_path, columns=list(dict.fromkeys([*columns, "text"])), filters=filters)
+    if not words:
+        return table.slice(0, 0)
+    for word in words:
+        table = table.filter(pc.match_substring(table["text"], word, ignore_case=True))
+    return table
+
+
+@lru_cache(maxsize=ARCHIVE_CACHE_SIZE)
+def _partition_counts(
+    path: str,
+    key_length: int,
+    start_iso: str,
+    end_iso: str,
+    keyword: Optional[str],
+    id_range: Optional[Tuple[int, int]],
+) -> Tuple[Tuple[str, int, int, int], ...]:
+    import pyarrow.compute as pc
+
+    with span("archive_read"):
+        table = _read_partition(path, ["created_at", "sentiment"], start_iso, end_iso, keyword, id_range)
+        keys = pc.utf8_slice_codeunits(table["created_at"], 0, key_length)
+        grouped = (
+            table.select(["sentiment"])
+            .append_column("key", keys)
+            .group_by(["key", "sentiment"])
+            .aggregate([([], "count_all")])
+            .to_pylist()
+        )
+    counts: Dict[str, List[int]] = {}
+    for row in grouped:
+        counts.setdefault(row["key"], [0, 0, 0])[_LABELS.index(str(row["sentiment"]))] += row["count_all"]
+    return tuple((key, *values) for key, values in sorted(counts.items()))
+
+
+def _rollup(bucket: str, key: str) -> str:
+    if bucket == "week":
+        day = date.fromisoformat(key)
+        return (day - timedelta(days=day.weekday())).isoformat()
+    return key
+
+
+def merge_archived_counts(
+    rows: List[Tuple[str, int, int, int]],
+    partitions: Sequence[db.ArchivedPartition],
+    bucket: str,
+    start_iso: str,
+    end_iso: str,
+    keyword: Optional[str] = None,
+    id_range: Optional[Tuple[int, int]] = None,
+) -> List[Tuple[str, int, int, int]]:
+    """Add the archived months' counts to `rows` of (bucket key, pos, neu, neg) from the live table.
+
+    Only the listed partitions (the months overlapping the range) are read.
+    Raises RuntimeError when one of them cannot be read, rather than
+    returning counts that silently miss a month.
+    """
+    totals: Dict[str, List[int]] = {key: [pos, neu, neg] for key, pos, neu, neg in rows}
+    for month, path, min_id, max_id in partitions:
+        ids = id_range
+        if ids is not None:
+            if ids[0] >= max_id or ids[1] < min_id:
+                continue
+            if ids[0] < min_id and ids[1] >= max_id:
+                ids = None
+        # Clip to the month so a partition fully inside the range caches under one key
+        month_start, month_end = _month_bounds(month)
+        try:
+            counts = _partition_counts(
+                path, _KEY_LENGTHS[bucket], max(start_iso, month_start), min(end_iso, month_end),
+                keyword or None, ids,
+            )
+        except (RuntimeError, OSError) as e:
+            raise _unreadable(month, e) from e
+        for key, pos, neu, neg in counts:
+            total = totals.setdefault(_rollup(bucket, key), [0, 0, 0])
+            total[0] += pos
+            total[1] += neu
+            total[2] += neg
+    return [(key, *values) for key, values in sorted(totals.items())]
+
+
+def archived_rows(
+    partitions: Sequence[db.ArchivedPartition], start_iso: str, end_iso: str
+) -> List[Tuple[int, str, str, str]]:
+    """(id, text, sentiment, created_at) rows of the archived months within the range.
+
+    Raises RuntimeError when a partition cannot be read, like `merge_archived_counts`.
+    """
+    rows: List[Tuple[int, str, str, str]] = []
+    for month, path, _, _ in partitions:
+        try:
+            with span("archive_read"):
+                table = _read_partition(path, ["id", "text", "sentiment", "created_at"], start_iso, end_iso)
+        except (RuntimeError, OSError) as e:
+            raise _unreadable(month, e) from e
+        columns = table.to_pydict()
+        rows += zip(columns["id"], columns["text"], map(str, columns["sentiment"]), columns["created_at"])
+    return rows
+
+
+def search_archived(
+    partitions: Sequence[db.ArchivedPartition],
+    keyword: Optional[str],
+    start_iso: str,
+    end_iso: str,
+    sentiment: Optional[str] = None,
+    limit: int = 100,
+) -> List[Tuple[int, str, str, str]]:
+    """Newest `limit` archived (id, text, sentiment, created_at) rows mentioning `keyword`.
+
+    Partitions are read from the newest month back and only until enough
+    rows are found. Raises RuntimeError when one cannot be read.
+    """
+    rows: List[Tuple[int, str, str, str]] = []
+    for month, path, _, _ in sorted(partitions, reverse=True):
+        if len(rows) >= limit:
+            break
+        try:
+            with span("archive_read"):
+                table = _read_partition(
+                    path, ["id", "text", "sentiment", "created_at"], start_iso, end_iso, keyword, sentiment=sentiment
+                )
+        except (RuntimeError, OSError) as e:
+            raise _unreadable(month, e) from e
+        newest = table.sort_by([("created_at", "descending"), ("id", "descending")])
+        columns = newest.slice(0, limit - len(rows)).to_pydict()
+        rows += zip(columns["id"], columns["text"], map(str, columns["sentiment"]), columns["created_at"])
+    return rows
+
+
+def _unreadable(month: str, error: Exception) -> RuntimeError:
+    incr("fallbacks", stage="archive")
+    return RuntimeError(f"Archived month {month} could not be read: {error}")
+
+
+def closed_months(keep_months: int = ARCHIVE_KEEP_MONTHS, today: Optional[date] = None) -> List[str]:
+    """Months (YYYY-MM) with live reviews that are older than the kept window."""
+    today = today or datetime.utcnow().date()
+    index = today.year * 12 + today.month - 1 - max(keep_months, 1) + 1
+    cutoff = f"{index // 12:04d}-{index % 12 + 1:02d}-01"
+    with db.get_conn() as conn:
+        months = []
+        row = conn.execute("SELECT MIN(created_at) FROM reviews WHERE created_at < ?", (cutoff,)).fetchone()
+        # Walk month by month over the created_at index instead of grouping every row
+        while row and row[0]:
+            month = row[0][:7]
+            months.append(month)
+            row = conn.execute(
+                "SELECT MIN(created_at) FROM reviews WHERE created_at > ? AND created_at < ?",
+                (_month_bounds(month)[1], cutoff),
+            ).fetchone()
+    return months
+
+
+def archive_month(month: str) -> int:
+    """Move one month's reviews into its Parquet partition; returns the rows moved.
+
+    Runs in a single write transaction: the file is written, the catalog
+    updated and the rows deleted (their FTS entries go with them through the
+    delete trigger) before anyone else can write. Reviews that arrive for an
+    already archived month are merged into a fresh copy of its file; the
+    replaced file stays on disk until `remove_superseded` collects it.
+    """
+    pq = _parquet()
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    month_start, month_end = _month_bounds(month)
+    os.makedirs(archive_dir(), exist_ok=True)
+    with db.get_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            "SELECT id, text, sentiment, created_at FROM reviews WHERE created_at BETWEEN ? AND ? "
+            "ORDER BY created_at, id",
+            (month_start, month_end),
+        ).fetchall()
+        if not rows:
+            return 0
+        ids, texts, sentiments, created = (list(column) for column in zip(*rows))
+        table = pa.table(
+            {
+                "id": pa.array(ids, pa.int64()),
+                "text": pa.array(texts, pa.string()),
+                "sentiment": pa.array(sentiments, pa.string()).dictionary_encode(),
+                "created_at": pa.array(created, pa.string()),
+            }
+        )
+        previous = conn.execute("SELECT path FROM review_archive WHERE month = ?", (month,)).fetchone()
+        if previous is not None:
+            old = pq.read_table(os.path.join(archive_dir(), previous[0]), columns=table.column_names)
+            table = pa.concat_tables([old.cast(table.schema), table]).sort_by(
+                [("created_at", "ascending"), ("id", "ascending")]
+            )
+        # What keyword filters match on, since the FTS index stays behind
+        terms = _index_terms(table["text"].to_pylist())
+        if terms is not None:
+            table = table.append_column("terms", pa.array(terms, pa.string()))
+        min_id, max_id = pc.min_max(table["id"]).values()
+        # A new name per version: readers holding the old catalog entry keep a
+        # valid file for the grace period, which starts when it is replaced
+        path = f"reviews-{month}.{max_id.as_py()}.parquet"
+        full_path = os.path.join(archive_dir(), path)
+        try:
+            pq.write_table(table, full_path + ".tmp", compression=ARCHIVE_COMPRESSION)
+            os.replace(full_path + ".tmp", full_path)
+            if previous is not None and previous[0] != path:
+                os.utime(os.path.join(archive_dir(), previous[0]))
+            conn.execute(
+                "INSERT OR REPLACE INTO review_archive (month, path, rows, min_id, max_id, archived_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (month, path, table.num_rows, min_id.as_py(), max_id.as_py(), datetime.utcnow().isoformat()),
+            )
+            conn.execute(
+                "DELETE FROM reviews WHERE created_at BETWEEN ? AND ? AND id <= ?",
+                (month_start, month_end, max(ids)),
+            )
+        except BaseException:
+            if os.path.exists(full_path + ".tmp"):
+                os.remove(full_path + ".tmp")
+            if previous is None or previous[0] != path:
+                if os.path.exists(full_path):
+                    os.remove(full_path)
+            raise
+    return len(rows)
+
+
+def remove_superseded(grace_seconds: float = ARCHIVE_GRACE_SECONDS) -> List[str]:
+    """Delete partition files the catalog no longer lists once they are older
+    than the grace period; returns the removed file names.
+
+    `archive_month` touches a file when it replaces it, so the period runs
+    from the replacement. Files of an archive run still in progress are
+    recent too and are left alone.
+    """
+    directory = archive_dir()
+    if not os.path.isdir(directory):
+        return []
+    with db.get_conn() as conn:
+        listed = {path for (path,) in conn.execute("SELECT path FROM review_archive")}
+    cutoff = time.time() - grace_seconds
+    removed = []
+    for name in sorted(os.listdir(directory)):
+        if name in listed or not _PARTITION_FILE.fullmatch(name):
+            continue
+        full_path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(full_path) < cutoff:
+                os.remove(full_path)
+                removed.append(name)
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def archive_closed_months(keep_months: int = ARCHIVE_KEEP_MONTHS) -> Dict[str, int]:
+    """Archive every month older than the kept window; returns rows moved per month.
+
+    Files replaced by earlier runs whose grace period has passed are removed.
+    """
+    moved = {month: archive_month(month) for month in closed_months(keep_months)}
+    remove_superseded()
+    return moved
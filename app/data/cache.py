@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+from .db import get_conn
+from ..utils.metrics import register_stats
+
+
+# Entries older than this many seconds are treated as misses
+CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+# Least recently used entries beyond this count are evicted
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+# Eviction runs once every this many writes rather than on each one
+_EVICT_EVERY = 64
+# A hit refreshes last_used only when it is older than this many seconds, so
+# repeated hits stay reads instead of each taking the write lock; eviction
+# order is LRU to within this interval
+CACHE_TOUCH_INTERVAL = float(os.getenv("RESPONSE_CACHE_TOUCH_INTERVAL", "60"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+_writes_since_evict = 0
+
+
+def response_cache_enabled() -> bool:
+    return os.getenv("RESPONSE_CACHE", "true").lower() not in {"0", "false", "no"}
+
+
+def normalize_review(text: str) -> str:
+    """Fold case, Unicode forms and whitespace so trivial variants share a key."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def make_cache_key(text: str, model: str, prompt_version: str) -> str:
+    payload = "\x1f".join([prompt_version, model, normalize_review(text)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += n
+
+
+def get_cached_response(key: str) -> Optional[Tuple[str, str]]:
+    """Return the cached (sentiment, reply) for `key`, or None on a miss."""
+    now = time.time()
+    with get_conn() as conn:
+        row = conn.execute(
+            "SELECT sentiment, reply, last_used FROM response_cache WHERE key = ? AND created_at >= ?",
+            (key, now - CACHE_TTL),
+        ).fetchone()
+    _count("hits" if row is not None else "misses")
+    if row is None:
+        return None
+    if row[2] < now - CACHE_TOUCH_INTERVAL:
+        with get_conn() as conn:
+            conn.execute(
+                "UPDATE response_cache SET last_used = ? WHERE key = ? AND last_used < ?",
+                (now, key, now - CACHE_TOUCH_INTERVAL),
+            )
+    return row[0], row[1]
+
+
+def put_cached_response(key: str, sentiment: str, reply: str) -> None:
+    global _writes_since_evict
+    now = time.time()
+    with get_conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, sentiment, reply, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, sentiment, reply, now, now),
+        )
+    _count("writes")
+    with _stats_lock:
+        _writes_since_evict += 1
+        due = _writes_since_evict >= _EVICT_EVERY
+        if due:
+            _writes_since_evict = 0
+    if due:
+        evict_response_cache()
+
+
+def evict_response_cache() -> int:
+    """Drop expired entries and trim to the size bound. Returns rows removed."""
+    with get_conn() as conn:
+        expired = conn.execute(
+            "DELETE FROM response_cache WHERE created_at < ?", (time.time() - CACHE_TTL,)
+        ).rowcount
+        trimmed = conn.execute(
+            "DELETE FROM response_cache WHERE key IN ("
+            "SELECT key FROM response_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (CACHE_MAX_ENTRIES,),
+        ).rowcount
+    _count("evictions", expired + trimmed)
+    return expired + trimmed
+
+
+def clear_response_cache() -> None:
+    with get_conn() as conn:
+        conn.execute("DELETE FROM response_cache")
+
+
+def response_cache_stats() -> Dict[str, float]:
+    with _stats_lock:
+        stats: Dict[str, float] = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+register_stats("response_cache", response_cache_stats)
@@ -1,35 +1,142 @@
 from __future__ import annotations
 
 import os
+import re
 import sqlite3
+import threading
 from contextlib import contextmanager
 from datetime import datetime, date
-from typing import Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Literal, Optional, Tuple
 
-import pandas as pd
+from ..utils.metrics import span
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 DB_DIR = os.path.join(os.path.dirname(__file__))
-DB_PATH = os.path.abspath(os.path.join(DB_DIR, "feedback.db"))
+DB_PATH = os.path.abspath(os.getenv("FEEDBACK_DB_PATH") or os.path.join(DB_DIR, "feedback.db"))
+# The database the app serves; `use_database` moves DB_PATH away from it
+APP_DB_PATH = DB_PATH
+
+# Seconds a connection waits on a locked database before raising
+BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "10"))
+# NORMAL is durable across application crashes in WAL mode; use FULL to also
+# survive power loss at the cost of an fsync per commit
+SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+
+_local = threading.local()
+_registry_lock = threading.Lock()
+_connections: Dict[threading.Thread, sqlite3.Connection] = {}
+_generation = 0
+_dir_ready = False
+# Whether each database file has the FTS5 index (None: not checked yet)
+_fts_enabled: Dict[str, bool] = {}
+# Tokenizer of the reviews_fts index; archive.py tokenizes archived reviews with it too
+_FTS_TOKENIZE = "porter unicode61 remove_diacritics 2"
 
 
 def _ensure_dir_exists() -> None:
-    os.makedirs(DB_DIR, exist_ok=True)
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+
+
+def _connect() -> sqlite3.Connection:
+    global _dir_ready
+    if not _dir_ready:
+        _ensure_dir_exists()
+        _dir_ready = True
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=BUSY_TIMEOUT,
+        check_same_thread=False,
+        cached_statements=256,
+    )
+    # WAL lets readers proceed while a writer holds the lock. The mode is
+    # stored in the file, so only switch when needed: switching takes an
+    # exclusive lock that other worker processes would have to wait out.
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] != "wal":
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+
+def _thread_conn() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == DB_PATH and _local.generation == _generation:
+        return conn
+    conn = _connect()
+    _local.conn = conn
+    _local.path = DB_PATH
+    _local.generation = _generation
+    _local.depth = 0
+    current = threading.current_thread()
+    with _registry_lock:
+        # Drop connections owned by threads that have exited
+        for thread in [t for t in _connections if not t.is_alive()]:
+            _connections.pop(thread).close()
+        stale = _connections.pop(current, None)
+        if stale is not None and stale is not conn:
+            stale.close()
+        _connections[current] = conn
+    return conn
 
 
 @contextmanager
 def get_conn():
-    _ensure_dir_exists()
-    conn = sqlite3.connect(DB_PATH)
+    """Yield this thread's pooled connection wrapped in a transaction.
+
+    Connections are opened once per thread and reused. The outermost
+    `get_conn` block commits on success and rolls back on error; nested
+    blocks join the enclosing transaction.
+    """
+    conn = _thread_conn()
+    _local.depth += 1
     try:
         yield conn
+    except BaseException:
+        if _local.depth == 1:
+            conn.rollback()
+        raise
+    else:
+        if _local.depth == 1:
+            conn.commit()
     finally:
-        conn.commit()
-        conn.close()
+        _local.depth -= 1
+
+
+def close_connections() -> None:
+    """Close every pooled connection. Threads reconnect lazily on next use."""
+    global _generation
+    with _registry_lock:
+        _generation += 1
+        for conn in _connections.values():
+            conn.close()
+        _connections.clear()
+
+
+def use_database(path: str) -> None:
+    """Point the store at another SQLite file and create its schema.
+
+    Pooled connections to the previous file are closed; used by the
+    benchmarks and data tools to work on a scratch database.
+    """
+    global DB_PATH, _dir_ready
+    close_connections()
+    DB_PATH = os.path.abspath(path)
+    _dir_ready = False
+    init_db()
 
 
 def init_db() -> None:
     with get_conn() as conn:
+        if not conn.in_transaction:
+            # Hold the write lock for the whole schema setup so worker
+            # processes starting together don't race on it (e.g. two FTS
+            # rebuilds)
+            conn.execute("BEGIN IMMEDIATE")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS reviews (
@@ -40,8 +147,170 @@ def init_db() -> None:
             );
             """
         )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_created_at ON reviews(created_at)")
+        # Covering index for the per-day sentiment aggregation
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reviews_created_at_sentiment ON reviews(created_at, sentiment)"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                sentiment TEXT NOT NULL,
+                reply TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_last_used ON response_cache(last_used)")
+        # Bumped on every write to a day so derived artifacts (e.g. rendered
+        # plots) can tell precisely when their range has changed
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS review_day_versions (
+                day TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            );
+            """
+        )
+        # Months moved out of `reviews` into Parquet files (see archive.py)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS review_archive (
+                month TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                rows INTEGER NOT NULL,
+                min_id INTEGER NOT NULL,
+                max_id INTEGER NOT NULL,
+                archived_at TEXT NOT NULL
+            );
+            """
+        )
+        _fts_enabled[DB_PATH] = _init_fts(conn)
+
+
+# Full-text index over reviews.text. External content: the text is stored
+# once in `reviews`. New rows are indexed by insert_review(s) one batch at a
+# time (several times faster than a per-row insert trigger); the triggers
+# cover deletes and edits.
+#
+# There is deliberately no insert trigger. Any other code that INSERTs into
+# `reviews` must call `index_new_reviews` in the same transaction. Otherwise
+# keyword filters silently miss those rows until the index is rebuilt with
+# INSERT INTO reviews_fts(reviews_fts) VALUES ('rebuild').
+_FTS_TRIGGERS = {
+    "reviews_fts_ad": """
+        CREATE TRIGGER IF NOT EXISTS reviews_fts_ad AFTER DELETE ON reviews BEGIN
+            INSERT INTO reviews_fts(reviews_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        END
+    """,
+    "reviews_fts_au": """
+        CREATE TRIGGER IF NOT EXISTS reviews_fts_au AFTER UPDATE OF text ON reviews BEGIN
+            INSERT INTO reviews_fts(reviews_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            INSERT INTO reviews_fts(rowid, text) VALUES (new.id, new.text);
+        END
+    """,
+}
+
+
+def _init_fts(conn: sqlite3.Connection) -> bool:
+    """Create the FTS5 index and its triggers; False if SQLite lacks FTS5."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reviews_fts'"
+    ).fetchone()
+    if not exists:
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE reviews_fts USING fts5("
+                f"text, content='reviews', content_rowid='id', tokenize='{_FTS_TOKENIZE}')"
+            )
+        except sqlite3.OperationalError as e:
+            print(f"[db] FTS5 unavailable, keyword filters fall back to LIKE scans: {e}")
+            return False
+        # Index reviews written before the FTS table existed
+        conn.execute("INSERT INTO reviews_fts(reviews_fts) VALUES ('rebuild')")
+    for ddl in _FTS_TRIGGERS.values():
+        conn.execute(ddl)
+    return True
+
+
+def fts_available() -> bool:
+    """Whether keyword filters on the current database use the FTS5 index."""
+    enabled = _fts_enabled.get(DB_PATH)
+    if enabled is None:
+        with get_conn() as conn:
+            enabled = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reviews_fts'"
+            ).fetchone() is not None
+        _fts_enabled[DB_PATH] = enabled
+    return enabled
+
 
+# Secondary indexes on reviews; rebuilt by init_db
+_REVIEW_INDEXES = ("idx_reviews_created_at", "idx_reviews_created_at_sentiment")
 
+
+@contextmanager
+def bulk_load(allow_app_db: bool = False):
+    """Speed up a large load by dropping the reviews indexes.
+
+    The indexes are dropped from the database file, not just for this
+    thread: until the block exits, every connection and worker process
+    using the file scans `reviews` without them. Meant for a scratch
+    database (see `use_database`); the app database is refused unless
+    `allow_app_db` is set, e.g. while the app is stopped.
+
+    Inside the block this thread's connection runs with `synchronous` OFF;
+    on exit the indexes are rebuilt in one pass and the planner statistics
+    are refreshed. Not crash-safe: rerun the load if it is interrupted.
+    """
+    if DB_PATH == APP_DB_PATH and not allow_app_db:
+        raise RuntimeError(
+            f"bulk_load would drop the reviews indexes of the app database {DB_PATH} for every process "
+            "using it; load into a scratch file with use_database(), or pass allow_app_db=True."
+        )
+    with get_conn() as conn:
+        for name in _REVIEW_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        yield
+    finally:
+        conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+        init_db()
+        conn.execute("PRAGMA optimize")
+
+
+def index_new_reviews(conn: sqlite3.Connection, count: int) -> None:
+    """Add the `count` reviews just inserted on `conn` to the FTS index.
+
+    Call it inside the transaction that inserted them: the write lock is
+    then held for the whole insert, so their ids are the contiguous run
+    ending at last_insert_rowid().
+    """
+    if not fts_available():
+        return
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    conn.execute(
+        "INSERT INTO reviews_fts(rowid, text) SELECT id, text FROM reviews WHERE id BETWEEN ? AND ?",
+        (last_id - count + 1, last_id),
+    )
+
+
+def _bump_day_versions(conn: sqlite3.Connection, created_at_isos: Iterable[str]) -> None:
+    touched: Dict[str, int] = {}
+    for created_at_iso in created_at_isos:
+        day = created_at_iso[:10]
+        touched[day] = touched.get(day, 0) + 1
+    conn.executemany(
+        "INSERT INTO review_day_versions (day, version) VALUES (?, ?) "
+        "ON CONFLICT(day) DO UPDATE SET version = version + excluded.version",
+        touched.items(),
+    )
+
+
+@span("db_insert")
 def insert_review(text: str, sentiment: str, created_at: Optional[datetime] = None) -> int:
     if created_at is None:
         created_at = datetime.utcnow()
@@ -51,18 +320,161 @@ def insert_review(text: str, sentiment: str, created_at: Optional[datetime] = No
             "INSERT INTO reviews (text, sentiment, created_at) VALUES (?, ?, ?)",
             (text, sentiment, created_at_iso),
         )
+        if fts_available():
+            conn.execute("INSERT INTO reviews_fts(rowid, text) VALUES (?, ?)", (cur.lastrowid, text))
+        _bump_day_versions(conn, [created_at_iso])
         return int(cur.lastrowid)
 
 
-def fetch_reviews_between(start_date: date, end_date: date) -> pd.DataFrame:
+@span("db_insert")
+def insert_reviews(rows: Iterable[Tuple[str, str, Optional[datetime]]]) -> int:
+    """Insert many (text, sentiment, created_at) rows in a single transaction.
+
+    `created_at` may be None, in which case the current UTC time is used.
+    Returns the number of rows written.
+    """
+    now = datetime.utcnow()
+    params = [
+        (text, sentiment, (created_at or now).isoformat())
+        for text, sentiment, created_at in rows
+    ]
+    if not params:
+        return 0
+    with get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO reviews (text, sentiment, created_at) VALUES (?, ?, ?)",
+            params,
+        )
+        index_new_reviews(conn, len(params))
+        _bump_day_versions(conn, (created_at_iso for _, _, created_at_iso in params))
+    return len(params)
+
+
+def _range_bounds(start_date: date, end_date: date) -> Tuple[str, str]:
     start_iso = datetime.combine(start_date, datetime.min.time()).isoformat()
     end_iso = datetime.combine(end_date, datetime.max.time()).isoformat()
+    return start_iso, end_iso
+
+
+def _fts_query(keyword: str) -> Optional[str]:
+    """Turn free text into an FTS5 query that matches reviews containing all of its words."""
+    terms = re.findall(r"\w+", keyword.lower())
+    return " ".join(f'"{term}"' for term in terms) if terms else None
+
+
+def _text_filter(keyword: Optional[str]) -> Tuple[str, str, List[str]]:
+    """SQL (join, condition, params) restricting `reviews` rows to those mentioning `keyword`.
+
+    Uses an indexed FTS5 MATCH when available, otherwise LIKE per word. A
+    keyword without any word characters (e.g. "!!!") matches no review.
+    """
+    if not keyword or not keyword.strip():
+        return "", "", []
+    query = _fts_query(keyword)
+    if query is None:
+        return "", " AND 0", []
+    if fts_available():
+        return (
+            "JOIN reviews_fts ON reviews_fts.rowid = reviews.id",
+            " AND reviews_fts MATCH ?",
+            [query],
+        )
+    words = re.findall(r"\w+", keyword.lower())  # type: ignore[union-attr]
+    like = "".join(" AND reviews.text LIKE ? ESCAPE '\\'" for _ in words)
+    # "_" is a LIKE wildcard but also a word character
+    return "", like, ["%" + word.replace("_", "\\_") + "%" for word in words]
+
+
+@span("db_query")
+def search_reviews(
+    keyword: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    sentiment: Optional[str] = None,
+    limit: int = 100,
+) -> pd.DataFrame:
+    """Return the newest reviews mentioning every word of `keyword`.
+
+    Optionally restricted to a date range and a sentiment. Matching uses
+    the FTS5 index (stemmed, case and accent insensitive) when available.
+    Archived months are searched too, newest first, until `limit` is reached.
+    """
+    import pandas as pd
+
+    join, condition, params = _text_filter(keyword)
+    sql = f"SELECT reviews.id, reviews.text, reviews.sentiment, reviews.created_at FROM reviews {join} WHERE 1 = 1{condition}"
+    args: List[object] = list(params)
+    start_date, end_date = start_date or date.min, end_date or date.max
+    start_iso, end_iso = _range_bounds(start_date, end_date)
+    if start_date != date.min or end_date != date.max:
+        sql += " AND reviews.created_at BETWEEN ? AND ?"
+        args += [start_iso, end_iso]
+    if sentiment:
+        sql += " AND reviews.sentiment = ?"
+        args.append(sentiment)
+    sql += " ORDER BY reviews.created_at DESC, reviews.id DESC LIMIT ?"
+    args.append(limit)
+    with get_conn() as conn:
+        _begin_read(conn)
+        partitions = _archived_partitions(conn, start_date, end_date)
+        rows = conn.execute(sql, args).fetchall()
+    if partitions:
+        from .archive import search_archived
+
+        rows += search_archived(partitions, keyword, start_iso, end_iso, sentiment, limit)
+        rows = sorted(rows, key=lambda row: (row[3], row[0]), reverse=True)[:limit]
+    df = pd.DataFrame(rows, columns=["id", "text", "sentiment", "created_at"])
+    df["created_at"] = pd.to_datetime(df["created_at"], format="ISO8601", errors="coerce")
+    return df
+
+
+@span("db_query")
+def get_data_version(start_date: date, end_date: date) -> int:
+    """Return a number that increases whenever a review is written in the range."""
+    with get_conn() as conn:
+        row = conn.execute(
+            "SELECT COALESCE(SUM(version), 0) FROM review_day_versions WHERE day BETWEEN ? AND ?",
+            (start_date.isoformat(), end_date.isoformat()),
+        ).fetchone()
+    return int(row[0])
+
+
+ArchivedPartition = Tuple[str, str, int, int]
+
+
+def _archived_partitions(conn: sqlite3.Connection, start_date: date, end_date: date) -> List[ArchivedPartition]:
+    """(month, file, min_id, max_id) of the archived months overlapping the range."""
+    return conn.execute(
+        "SELECT month, path, min_id, max_id FROM review_archive WHERE month BETWEEN ? AND ? ORDER BY month",
+        (start_date.isoformat()[:7], end_date.isoformat()[:7]),
+    ).fetchall()
+
+
+def _begin_read(conn: sqlite3.Connection) -> None:
+    # One read snapshot for the archive catalog and the hot rows, so a month
+    # being archived concurrently is counted exactly once
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+
+
+@span("db_query")
+def fetch_reviews_between(start_date: date, end_date: date) -> pd.DataFrame:
+    """Reviews created in the range, from archived months and the live table."""
+    import pandas as pd
+
+    start_iso, end_iso = _range_bounds(start_date, end_date)
     with get_conn() as conn:
+        _begin_read(conn)
+        partitions = _archived_partitions(conn, start_date, end_date)
         cur = conn.execute(
             "SELECT id, text, sentiment, created_at FROM reviews WHERE created_at BETWEEN ? AND ?",
             (start_iso, end_iso),
         )
         rows = cur.fetchall()
+    if partitions:
+        from .archive import archived_rows
+
+        rows = archived_rows(partitions, start_iso, end_iso) + rows
     if not rows:
         return pd.DataFrame(columns=["id", "text", "sentiment", "created_at"])
     df = pd.DataFrame(rows, columns=["id", "text", "sentiment", "created_at"])
@@ -74,29 +486,155 @@ def fetch_reviews_between(start_date: date, end_date: date) -> pd.DataFrame:
     return df
 
 
-def get_sentiment_counts_by_day(start_date: date, end_date: date) -> pd.DataFrame:
-    df = fetch_reviews_between(start_date, end_date)
-    if df.empty:
+Bucket = Literal["hour", "day", "week", "month"]
+BUCKETS: Tuple[Bucket, ...] = ("hour", "day", "week", "month")
+
+# Upper bound on points per series, whatever bucket is requested
+MAX_BUCKETS = int(os.getenv("TREND_MAX_BUCKETS", "400"))
+
+# Per-row grouping key (a cheap prefix of the ISO timestamp) and the rollup
+# applied to those keys; weeks start on Monday
+_BUCKET_SQL: Dict[str, Tuple[str, str]] = {
+    "hour": ("substr(created_at, 1, 13)", "key"),
+    "day": ("substr(created_at, 1, 10)", "key"),
+    "week": ("substr(created_at, 1, 10)", "date(key, 'weekday 0', '-6 days')"),
+    "month": ("substr(created_at, 1, 7)", "key"),
+}
+
+
+def _bucket_count(bucket: str, days: int) -> int:
+    return {"hour": days * 24, "day": days, "week": days // 7 + 2, "month": days // 28 + 2}[bucket]
+
+
+def choose_bucket(start_date: date, end_date: date, bucket: Optional[str] = None) -> Bucket:
+    """Pick the grouping for a range: hours up to 2 days, days up to ~3 months,
+    weeks up to 2 years, months beyond.
+
+    An explicit `bucket` is honoured unless it would exceed `MAX_BUCKETS`
+    points, in which case the next coarser one is used.
+    """
+    days = (end_date - start_date).days + 1
+    if bucket not in BUCKETS:
+        if days <= 2:
+            bucket = "hour"
+        elif days <= 92:
+            bucket = "day"
+        elif days <= 731:
+            bucket = "week"
+        else:
+            bucket = "month"
+    for candidate in BUCKETS[BUCKETS.index(bucket):]:
+        if _bucket_count(candidate, days) <= MAX_BUCKETS:
+            return candidate
+    return "month"
+
+
+def _bucket_start(bucket: str, key: str):
+    if bucket == "hour":
+        return datetime.strptime(key, "%Y-%m-%dT%H")
+    if bucket == "month":
+        return date.fromisoformat(f"{key}-01")
+    return date.fromisoformat(key)
+
+
+def max_review_id() -> int:
+    """Id of the newest review (0 when empty); ids only ever increase."""
+    with get_conn() as conn:
+        return int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM reviews").fetchone()[0])
+
+
+def get_sentiment_counts(
+    start_date: date,
+    end_date: date,
+    bucket: Optional[str] = None,
+    keyword: Optional[str] = None,
+    id_range: Optional[Tuple[int, int]] = None,
+) -> pd.DataFrame:
+    """Return positive/neutral/negative review counts per time bucket.
+
+    `bucket` is one of hour/day/week/month, or None to choose from the span
+    (see `choose_bucket`). The `date` column holds each bucket's start (a
+    datetime for hours, a date otherwise) and `df.attrs["bucket"]` the bucket
+    used. Grouping happens in SQLite over the (created_at, sentiment) index,
+    so only the downsampled series is materialized. With `keyword`, only
+    reviews mentioning it are counted, found through the FTS5 index.
+
+    `id_range=(after_id, upto_id)` counts only reviews with
+    after_id < id <= upto_id; the scan then walks that id range instead of
+    the date range, so counting newly added reviews costs O(new rows).
+
+    Archived months are read from their Parquet files and merged in. Their
+    keyword matches use index terms stored with each file by the FTS5
+    tokenizer, so they agree with the live table.
+    """
+    bucket = choose_bucket(start_date, end_date, bucket)
+    return _sentiment_counts(start_date, end_date, bucket, keyword, id_range)
+
+
+@span("db_query")
+def _sentiment_counts(
+    start_date: date,
+    end_date: date,
+    bucket: Bucket,
+    keyword: Optional[str] = None,
+    id_range: Optional[Tuple[int, int]] = None,
+) -> pd.DataFrame:
+    import pandas as pd
+
+    key_sql, rollup_sql = _BUCKET_SQL[bucket]
+    join, condition, params = _text_filter(keyword)
+    start_iso, end_iso = _range_bounds(start_date, end_date)
+    created_at = "created_at"
+    if id_range is not None:
+        if id_range[0] > 0:
+            # Unary + keeps the planner on the rowid range rather than the date index
+            created_at = "+created_at"
+        # FTS5 applies a rowid range inside the MATCH itself
+        id_column = "reviews_fts.rowid" if join else "reviews.id"
+        condition += f" AND {id_column} > ? AND {id_column} <= ?"
+        params = [*params, *id_range]
+    with get_conn() as conn:
+        _begin_read(conn)
+        partitions = _archived_partitions(conn, start_date, end_date)
+        rows = conn.execute(
+            f"""
+            SELECT {rollup_sql} AS bucket, SUM(pos), SUM(neu), SUM(neg)
+            FROM (
+                SELECT {key_sql} AS key,
+                       SUM(sentiment = 'positive') AS pos,
+                       SUM(sentiment = 'neutral') AS neu,
+                       SUM(sentiment = 'negative') AS neg
+                FROM reviews {join}
+                WHERE {created_at} BETWEEN ? AND ?{condition}
+                GROUP BY key
+            )
+            GROUP BY bucket
+            ORDER BY bucket
+            """,
+            (start_iso, end_iso, *params),
+        ).fetchall()
+    if partitions:
+        from .archive import merge_archived_counts
+
+        rows = merge_archived_counts(rows, partitions, bucket, start_iso, end_iso, keyword, id_range)
+    if not rows:
         # Return an empty frame with expected columns
-        return pd.DataFrame(columns=["date", "positive", "neutral", "negative"]).astype(
+        counts = pd.DataFrame(columns=["date", "positive", "neutral", "negative"]).astype(
             {"positive": int, "neutral": int, "negative": int}
         )
-    counts = (
-        df.groupby(["date", "sentiment"]).size().unstack(fill_value=0)[
-            ["positive", "neutral", "negative"]
-        ]
-        if set(["positive", "neutral", "negative"]).issubset(set(df["sentiment"].unique()))
-        else df.groupby(["date", "sentiment"]).size().unstack(fill_value=0)
-    )
-    # Ensure all columns exist
-    for col in ["positive", "neutral", "negative"]:
-        if col not in counts.columns:
-            counts[col] = 0
-    counts = counts.reset_index().sort_values("date")
-    counts[["positive", "neutral", "negative"]] = counts[[
-        "positive",
-        "neutral",
-        "negative",
-    ]].astype(int)
-    return counts[["date", "positive", "neutral", "negative"]]
+    else:
+        counts = pd.DataFrame(rows, columns=["date", "positive", "neutral", "negative"])
+        counts["date"] = [_bucket_start(bucket, key) for key in counts["date"]]
+        counts[["positive", "neutral", "negative"]] = counts[[
+            "positive",
+            "neutral",
+            "negative",
+        ]].astype(int)
+    counts.attrs["bucket"] = bucket
+    counts.attrs["keyword"] = keyword or ""
+    return counts
+
 
+def get_sentiment_counts_by_day(start_date: date, end_date: date) -> pd.DataFrame:
+    """Return one row per day with positive/neutral/negative review counts."""
+    return _sentiment_counts(start_date, end_date, "day")
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .db import insert_review, insert_reviews
+from ..utils.metrics import register_stats
+
+
+# "sync" writes each review before replying; "async" queues it for the background writer
+WRITE_MODE = os.getenv("REVIEW_WRITE_MODE", "sync").lower()
+QUEUE_MAX = int(os.getenv("REVIEW_QUEUE_MAX", "10000"))
+FLUSH_ROWS = int(os.getenv("REVIEW_FLUSH_ROWS", "500"))
+FLUSH_INTERVAL = float(os.getenv("REVIEW_FLUSH_INTERVAL", "0.05"))
+# Attempts per batch before it is dropped (e.g. while another process holds the lock)
+FLUSH_ATTEMPTS = 3
+
+ReviewRow = Tuple[str, str, Optional[datetime]]
+
+_STOP = object()
+_STAT_NAMES = ("rows_written", "rows_dropped", "flushes", "last_flush_ms", "max_flush_ms")
+
+
+class ReviewWriter:
+    """Background writer that drains queued reviews in batched transactions.
+
+    A batch is flushed once it holds `flush_rows` reviews or `flush_interval`
+    seconds after its first review arrived, whichever comes first. The queue
+    is bounded, so producers block instead of growing memory without limit.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = QUEUE_MAX,
+        flush_rows: int = FLUSH_ROWS,
+        flush_interval: float = FLUSH_INTERVAL,
+    ) -> None:
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, float] = dict.fromkeys(_STAT_NAMES, 0)
+        self._thread = threading.Thread(target=self._run, name="review-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, sentiment: str, created_at: Optional[datetime] = None) -> None:
+        # Stamp now so the stored time reflects when the review arrived, not when it was flushed
+        self._queue.put((text, sentiment, created_at or datetime.utcnow()))
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self) -> None:
+        """Block until everything queued so far has been written."""
+        self._queue.join()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write out the remaining queue and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self.depth()
+        return stats
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+            batch: List[ReviewRow] = [item]  # type: ignore[list-item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_rows:
+                remaining = deadline - time.monotonic()
+                try:
+                    # Past the deadline, still take whatever is already waiting
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)  # type: ignore[arg-type]
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch: List[ReviewRow]) -> None:
+        t0 = time.perf_counter()
+        for attempt in range(FLUSH_ATTEMPTS):
+            try:
+                insert_reviews(batch)
+                break
+            except Exception as e:
+                if attempt == FLUSH_ATTEMPTS - 1:
+                    print(f"[writer] Dropping {len(batch)} reviews after {FLUSH_ATTEMPTS} failed writes: {e}")
+                    with self._stats_lock:
+                        self._stats["rows_dropped"] += len(batch)
+                    return
+                time.sleep(0.1 * (attempt + 1))
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        with self._stats_lock:
+            self._stats["rows_written"] += len(batch)
+            self._stats["flushes"] += 1
+            self._stats["last_flush_ms"] = elapsed_ms
+            self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+
+
+_writer: Optional[ReviewWriter] = None
+_writer_lock = threading.Lock()
+
+
+def write_behind_enabled() -> bool:
+    return WRITE_MODE == "async"
+
+
+def get_review_writer() -> ReviewWriter:
+    """Return the process-wide writer, starting it on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ReviewWriter()
+                atexit.register(shutdown_review_writer)
+    return _writer
+
+
+def persist_review(text: str, sentiment: str, created_at: Optional[datetime] = None) -> None:
+    """Store a review, synchronously or via the write-behind queue per `REVIEW_WRITE_MODE`."""
+    if write_behind_enabled():
+        get_review_writer().submit(text, sentiment, created_at)
+    else:
+        insert_review(text, sentiment, created_at)
+
+
+def review_writer_stats() -> Dict[str, float]:
+    writer = _writer
+    if writer is None:
+        return {**dict.fromkeys(_STAT_NAMES, 0), "queue_depth": 0}
+    return writer.stats()
+
+
+def shutdown_review_writer(timeout: Optional[float] = 10.0) -> None:
+    """Drain the queue and stop the writer. Safe to call more than once."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
+
+
+register_stats("review_writer", review_writer_stats)
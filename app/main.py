@@ -1,19 +1,70 @@
 from __future__ import annotations
 
+import asyncio
+import importlib
 import os
-from typing import Any, Tuple, Generator
-import time
 import threading
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, Optional, Sequence, Tuple
+import time
 
-import gradio as gr
 from dotenv import load_dotenv, find_dotenv
 
 from .data.db import init_db
-from .agents.response_agent import analyze_and_respond
-from .agents.plot_agent import generate_sentiment_plot_from_prompt
+from .agents.response_agent import analyze_and_respond_async, analyze_and_respond_stream_async
+from .agents.live_trend import LIVE_REFRESH_INTERVAL, LiveTrend
+from .agents.plot_agent import generate_sentiment_plot_async
+from .utils.metrics import format_breakdown, prometheus_text, request_breakdown, span
+
+if TYPE_CHECKING:
+    import gradio as gr
+    from fastapi import FastAPI
+
+
+# Max simultaneous runs per event; async handlers don't pin a thread while waiting
+FEEDBACK_CONCURRENCY = int(os.getenv("FEEDBACK_CONCURRENCY", "64"))
+PLOT_CONCURRENCY = int(os.getenv("PLOT_CONCURRENCY", "16"))
+# Live charts hold their slot for as long as they run
+LIVE_CONCURRENCY = int(os.getenv("LIVE_CONCURRENCY", "16"))
+# Stream reply tokens into the Feedback Response tab as they are generated
+FEEDBACK_STREAMING = os.getenv("FEEDBACK_STREAMING", "true").lower() not in {"0", "false", "no"}
+# Show the slowest stages (llm, db_query, render, ...) next to the runtime timer
+SHOW_TIMINGS = os.getenv("SHOW_TIMINGS", "false").lower() in {"1", "true", "yes"}
+# Seconds between runtime timer updates while a plot is generating
+TIMER_INTERVAL = float(os.getenv("UI_TIMER_INTERVAL", "0.1"))
+# Requests allowed to wait in the UI queue before new ones are turned away (0: unbounded)
+UI_QUEUE_MAX = int(os.getenv("UI_QUEUE_MAX", "0"))
+
+# Heavy modules the agents import lazily; warmed up in the background at startup
+WARMUP_MODULES = [
+    "pandas",
+    "dateparser",
+    "langchain_core.prompts",
+    "langchain_core.output_parsers",
+    "langchain_openai",
+    "matplotlib.figure",
+    "matplotlib.backends.backend_agg",
+    "PIL.Image",
+    "app.agents.render",
+]
 
 
-def _bootstrap() -> None:
+def _warm_up() -> None:
+    """Import the lazily loaded dependencies and build shared state ahead of the first request."""
+    from .agents.llm_provider import get_llm
+    from .agents.sentiment import get_scorer
+    from .utils.date_utils import parse_date_range
+
+    for name in WARMUP_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"[main] Warm-up import of {name} failed: {e}")
+    get_scorer()
+    get_llm()
+    parse_date_range("June 1 to June 2")
+
+
+def _bootstrap(warm_up: Optional[bool] = None) -> None:
     # Robustly load .env from project root or parent dirs
     try:
         env_path = find_dotenv(usecwd=True)
@@ -22,47 +73,95 @@ def _bootstrap() -> None:
         # Continue without raising; app can still run with fallback behavior
         pass
     init_db()
+    if warm_up is None:
+        warm_up = os.getenv("WARMUP", "true").lower() not in {"0", "false", "no"}
+    if warm_up:
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
 
 
-def ui_feedback_response(feedback_text: str) -> Tuple[str, str, str]:
+def _runtime_html(elapsed: float, timings: Optional[Dict[str, float]] = None, prefix: str = "⏱") -> str:
+    detail = f" · {format_breakdown(timings)}" if SHOW_TIMINGS and timings else ""
+    return f"<span style='font-size:12px;color:#64748b'>{prefix} {elapsed:.1f}s{detail}</span>"
+
+
+async def ui_feedback_response(feedback_text: str) -> Tuple[str, str, str]:
     t0 = time.perf_counter()
-    sentiment, reply = analyze_and_respond(feedback_text)
+    with span("feedback_request"), request_breakdown() as timings:
+        sentiment, reply = await analyze_and_respond_async(feedback_text)
     elapsed = time.perf_counter() - t0
-    runtime_html = f"<span style='font-size:12px;color:#64748b'>⏱ {elapsed:.1f}s</span>"
-    return sentiment.capitalize(), reply, runtime_html
+    return sentiment.capitalize(), reply, _runtime_html(elapsed, timings)
+
 
+async def ui_feedback_response_stream(feedback_text: str) -> AsyncGenerator[Tuple[Any, str, str], None]:
+    """Stream the reply into the UI as the LLM writes it.
 
-def ui_sentiment_plot_stream(prompt: str, chart_type: str) -> Generator[Tuple[Any, Any, str], None, None]:
+    The sentiment label appears as soon as that field has been generated, and
+    the reply box fills in token by token. The final yield carries the saved
+    result.
+    """
+    t0 = time.perf_counter()
+    with span("feedback_request"), request_breakdown() as timings:
+        async for sentiment, reply in analyze_and_respond_stream_async(feedback_text):
+            label = sentiment.capitalize() if sentiment else None
+            yield label, reply, _runtime_html(time.perf_counter() - t0, timings)
+
+
+async def ui_sentiment_plot_stream(
+    prompt: str, chart_type: str, bucket: str = "", keyword: str = ""
+) -> AsyncGenerator[Tuple[Any, Any, str], None]:
     """Stream-only runtime timer without max cap while generating the plot.
 
     Yields (image, table, runtime_text) repeatedly. During processing, image and
     table are None and only runtime_text updates like "2.3s". On completion,
     yields the final image/table and the final elapsed seconds.
+
+    The timer waits on the plot task itself, so the final result is pushed as
+    soon as it is ready instead of on the next polling tick.
     """
     override = chart_type.lower() if chart_type else None
-    result: dict[str, Any] = {}
-    done = threading.Event()
+    granularity = bucket.lower() if bucket else None
+    t0 = time.perf_counter()
+    with span("plot_request"), request_breakdown() as timings:
+        # The task copies the current context, so its stages land in `timings`
+        task = asyncio.ensure_future(generate_sentiment_plot_async(prompt, override, granularity, keyword or None))
+        try:
+            while not task.done():
+                yield None, None, _runtime_html(time.perf_counter() - t0)
+                await asyncio.wait({task}, timeout=TIMER_INTERVAL)
+            image, df = task.result()
+        finally:
+            # Client went away mid-stream
+            if not task.done():
+                task.cancel()
 
-    def worker():
-        image, df = generate_sentiment_plot_from_prompt(prompt, override)
-        result["image"] = image
-        result["df"] = df
-        done.set()
+    elapsed = time.perf_counter() - t0
+    yield image, df, _runtime_html(elapsed, timings)
 
-    t0 = time.perf_counter()
-    thread = threading.Thread(target=worker, daemon=True)
-    thread.start()
 
-    while not done.is_set():
-        elapsed = time.perf_counter() - t0
-        yield None, None, f"<span style='font-size:12px;color:#64748b'>⏱ {elapsed:.1f}s</span>"
-        time.sleep(0.1)
+async def ui_live_plot_stream(
+    prompt: str, chart_type: str, bucket: str = "", keyword: str = ""
+) -> AsyncGenerator[Tuple[Any, Any, str], None]:
+    """Keep the trends plot current until the client stops or leaves.
 
-    elapsed = time.perf_counter() - t0
-    yield result.get("image"), result.get("df"), f"<span style='font-size:12px;color:#64748b'>⏱ {elapsed:.1f}s</span>"
+    Every LIVE_REFRESH_INTERVAL seconds only reviews added since the last
+    refresh are counted; the plot is re-rendered and pushed only when the
+    counts changed.
+    """
+    live = LiveTrend(prompt, chart_type.lower() or None, bucket.lower() or None, keyword or None)
+    while True:
+        t0 = time.perf_counter()
+        with span("live_refresh"), request_breakdown() as timings:
+            update = await live.refresh()
+        if update is not None:
+            image, df = update
+            prefix = f"● live · {time.strftime('%H:%M:%S')} ·"
+            yield image, df, _runtime_html(time.perf_counter() - t0, timings, prefix)
+        await asyncio.sleep(LIVE_REFRESH_INTERVAL)
 
 
 def build_ui() -> gr.Blocks:
+    import gradio as gr
+
     runtime_css = """
     .runtime-tiny { width: auto !important; flex: 0 0 auto !important; margin-left: 8px; align-self: center; }
     .runtime-tiny p { margin: 0 !important; }
@@ -80,7 +179,13 @@ def build_ui() -> gr.Blocks:
                 out_sent = gr.Label(label="Detected Sentiment")
                 sent_runtime = gr.HTML(value="", elem_classes=["runtime-tiny"]) 
             out_reply = gr.Textbox(label="Automated Reply", lines=4)
-            btn.click(ui_feedback_response, inputs=[inp], outputs=[out_sent, out_reply, sent_runtime], show_progress="hidden")
+            btn.click(
+                ui_feedback_response_stream if FEEDBACK_STREAMING else ui_feedback_response,
+                inputs=[inp],
+                outputs=[out_sent, out_reply, sent_runtime],
+                show_progress="hidden",
+                concurrency_limit=FEEDBACK_CONCURRENCY,
+            )
 
         with gr.Tab("Sentiment Trends"):
             rng = gr.Textbox(
@@ -88,12 +193,23 @@ def build_ui() -> gr.Blocks:
                 placeholder="e.g., last 7 days, June 1 to June 15, yesterday to today",
                 value="last 7 days",
             )
-            chart_choice = gr.Radio(["Auto", "Bar", "Line"], value="Auto", label="Chart Type")
-            btn2 = gr.Button("Generate Plot")
+            keyword = gr.Textbox(
+                label="Only reviews mentioning (optional)",
+                placeholder='e.g., broth — or write "mentioning broth" in the prompt',
+            )
+            with gr.Row():
+                chart_choice = gr.Radio(["Auto", "Bar", "Line"], value="Auto", label="Chart Type")
+                granularity = gr.Radio(
+                    ["Auto", "Hour", "Day", "Week", "Month"], value="Auto", label="Granularity"
+                )
+            with gr.Row():
+                btn2 = gr.Button("Generate Plot")
+                live_btn = gr.Button("Start Live")
+                stop_btn = gr.Button("Stop Live")
             with gr.Row():
                 img = gr.Image(label="Plot", type="pil")
                 runtime = gr.HTML(value="", elem_classes=["runtime-tiny"]) 
-            table = gr.Dataframe(label="Counts by Day", interactive=False)
+            table = gr.Dataframe(label="Counts per Period", interactive=False)
 
             def _normalize_choice(choice: str) -> str:
                 if choice.lower() == "bar":
@@ -103,24 +219,99 @@ def build_ui() -> gr.Blocks:
                 return ""  # Auto
 
             # Streaming wrapper must itself be a generator function (contain yield)
-            def _plot_stream_wrapper(prompt_text: str, choice_text: str):
+            async def _plot_stream_wrapper(
+                prompt_text: str, choice_text: str, granularity_text: str, keyword_text: str
+            ):
+                normalized = _normalize_choice(choice_text)
+                bucket = "" if granularity_text == "Auto" else granularity_text
+                async for update in ui_sentiment_plot_stream(prompt_text, normalized, bucket, keyword_text):
+                    yield update
+
+            async def _live_stream_wrapper(
+                prompt_text: str, choice_text: str, granularity_text: str, keyword_text: str
+            ):
                 normalized = _normalize_choice(choice_text)
-                yield from ui_sentiment_plot_stream(prompt_text, normalized)
+                bucket = "" if granularity_text == "Auto" else granularity_text
+                async for update in ui_live_plot_stream(prompt_text, normalized, bucket, keyword_text):
+                    yield update
 
+            live_event = live_btn.click(
+                fn=_live_stream_wrapper,
+                inputs=[rng, chart_choice, granularity, keyword],
+                outputs=[img, table, runtime],
+                show_progress="hidden",
+                concurrency_limit=LIVE_CONCURRENCY,
+            )
+            stop_btn.click(None, cancels=[live_event])
+            # A one-off plot replaces the live one
             btn2.click(
                 fn=_plot_stream_wrapper,
-                inputs=[rng, chart_choice],
+                inputs=[rng, chart_choice, granularity, keyword],
                 outputs=[img, table, runtime],
                 show_progress="hidden",
+                concurrency_limit=PLOT_CONCURRENCY,
+                cancels=[live_event],
             )
 
+    demo.queue(max_size=UI_QUEUE_MAX or None)
     return demo
 
 
-def main() -> None:
+def create_app(headless: Optional[bool] = None) -> FastAPI:
+    """FastAPI app serving the JSON API at /api, Prometheus metrics at /metrics
+    and, unless headless, the Gradio UI at /.
+
+    Headless mode defaults to the HEADLESS environment variable so that
+    uvicorn worker processes, which call this as a factory, pick it up.
+    """
+    from fastapi import FastAPI
+    from fastapi.responses import PlainTextResponse
+
+    from .api import router
+
     _bootstrap()
-    app = build_ui()
-    app.launch(server_name="127.0.0.1", server_port=7860)
+    server = FastAPI(title="SteamNoodles Feedback Agents")
+    server.include_router(router)
+
+    @server.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        return PlainTextResponse(prometheus_text(), media_type="text/plain; version=0.0.4")
+
+    if headless is None:
+        headless = os.getenv("HEADLESS", "false").lower() in {"1", "true", "yes"}
+    if headless:
+        return server
+
+    import gradio as gr
+
+    return gr.mount_gradio_app(server, build_ui(), path="/")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the feedback agents.")
+    parser.add_argument("--headless", action="store_true", help="Serve only the JSON API and /metrics, no UI")
+    parser.add_argument("--host", default=os.getenv("APP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("APP_PORT", "7860")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("APP_WORKERS", "1")),
+        help="Worker processes sharing the port (more than one requires --headless)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.headless:
+        os.environ["HEADLESS"] = "true"
+    headless = os.getenv("HEADLESS", "false").lower() in {"1", "true", "yes"}
+    if args.workers > 1 and not headless:
+        # Gradio keeps its queue and sessions in process memory, so a UI
+        # client's follow-up requests must reach the same worker
+        parser.error("--workers > 1 requires --headless")
+    uvicorn.run("app.main:create_app", factory=True, host=args.host, port=args.port, workers=args.workers)
 
 
 if __name__ == "__main__":
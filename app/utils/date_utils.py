@@ -1,37 +1,147 @@
 from __future__ import annotations
 
+import calendar
+import os
 import re
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Tuple
 
-import dateparser
+from .metrics import span
 
 
-def _parse_single_date(text: str, default: Optional[date] = None) -> Optional[date]:
+# Parsed ranges kept per (normalized prompt, today)
+DATE_CACHE_SIZE = int(os.getenv("DATE_CACHE_SIZE", "1024"))
+
+_MONTHS = {
+    name: index
+    for index in range(1, 13)
+    for name in {calendar.month_name[index].lower(), calendar.month_abbr[index].lower()}
+}
+_MONTHS["sept"] = 9
+_MONTH_RE = "|".join(sorted(_MONTHS, key=len, reverse=True))
+
+_WHITESPACE = re.compile(r"\s+")
+_LAST_N = re.compile(r"\b(?:last|past)\s+(\d+)\s+(day|week|month|year)s?\b")
+_PERIOD = re.compile(r"\b(this|last)\s+(week|month|year)\b")
+_ISO_DATE = re.compile(r"^(\d{4})[-/](\d{1,2})[-/](\d{1,2})$")
+_MONTH_DAY = re.compile(rf"^({_MONTH_RE})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?$")
+_DAY_MONTH = re.compile(rf"^(\d{{1,2}})(?:st|nd|rd|th)?\s+({_MONTH_RE})\.?(?:,?\s+(\d{{4}}))?$")
+_RELATIVE_DAYS = {"today": 0, "yesterday": -1, "tomorrow": 1}
+# A date the fast parser understands, at the end of a range's left side or the
+# start of its right side ("reviews from 2024-06-01", "june 15 by week")
+_DATE_TOKEN = (
+    rf"\d{{4}}[-/]\d{{1,2}}[-/]\d{{1,2}}"
+    rf"|(?:{_MONTH_RE})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:{_MONTH_RE})\.?(?:,?\s+\d{{4}})?"
+    r"|today|yesterday|tomorrow"
+)
+# What a date expression can start with: a digit, a month or weekday name or
+# a relative word. Keeps dates out of text captured by other prompt parsers.
+DATE_START = re.compile(
+    rf"\d|(?:{_MONTH_RE}|today|yesterday|tomorrow|last|past|this|next|from|since|until|till|between|during|in|on"
+    r"|(?:mon|tues|wednes|thurs|fri|satur|sun)day)\b"
+)
+_TRAILING_DATE = re.compile(rf"(?:^|\s)({_DATE_TOKEN})$")
+_LEADING_DATE = re.compile(rf"^({_DATE_TOKEN})(?:\s|$)")
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _add_months(d: date, months: int) -> date:
+    month_index = d.year * 12 + d.month - 1 + months
+    year, month = divmod(month_index, 12)
+    day = min(d.day, calendar.monthrange(year, month + 1)[1])
+    return date(year, month + 1, day)
+
+
+def _fast_single_date(text: str, today: date) -> Optional[date]:
+    """Parse the common single-date forms without dateparser."""
+    if text in _RELATIVE_DAYS:
+        return today + timedelta(days=_RELATIVE_DAYS[text])
+    m = _ISO_DATE.match(text)
+    if m:
+        return _safe_date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    m = _MONTH_DAY.match(text)
+    if m:
+        year = int(m.group(3)) if m.group(3) else today.year
+        return _safe_date(year, _MONTHS[m.group(1)], int(m.group(2)))
+    m = _DAY_MONTH.match(text)
+    if m:
+        year = int(m.group(3)) if m.group(3) else today.year
+        return _safe_date(year, _MONTHS[m.group(2)], int(m.group(1)))
+    return None
+
+
+def _parse_single_date(text: str, default: Optional[date] = None, today: Optional[date] = None) -> Optional[date]:
+    text = text.strip()
+    fast = _fast_single_date(text, today or date.today())
+    if fast is not None:
+        return fast
+    # Imported on first use: loading dateparser's locale tables is slow
+    import dateparser
+
     parsed = dateparser.parse(text)
     if parsed is None:
         return default
     return parsed.date()
 
 
+def _period_range(which: str, unit: str, today: date) -> Tuple[date, date]:
+    if unit == "week":
+        monday = today - timedelta(days=today.weekday())
+        if which == "this":
+            return monday, today
+        return monday - timedelta(days=7), monday - timedelta(days=1)
+    if unit == "year":
+        first = today.replace(month=1, day=1)
+        if which == "this":
+            return first, today
+        return first.replace(year=first.year - 1), first - timedelta(days=1)
+    first = today.replace(day=1)
+    if which == "this":
+        return first, today
+    last_month_end = first - timedelta(days=1)
+    return last_month_end.replace(day=1), last_month_end
+
+
+@span("date_parse")
 def parse_date_range(text: str) -> Tuple[date, date]:
     """Parse a human-friendly date range string into (start_date, end_date).
 
     Supports inputs like:
-    - "last 7 days"
+    - "last 7 days", "past 2 weeks", "last 3 months", "last 2 years"
+    - "this week", "last month", "this year"
     - "June 1 to June 15"
     - "2024-06-01 - 2024-06-15"
     - "yesterday to today"
     Falls back to [today - 7 days, today].
+
+    Common forms are matched by compiled patterns; dateparser is only used for
+    anything else. Results are memoized per (normalized text, today).
     """
-    text_norm = text.strip().lower()
-    today = date.today()
+    text_norm = _WHITESPACE.sub(" ", text.strip().lower())
+    return _parse_date_range_cached(text_norm, date.today())
+
 
-    # last N days
-    m = re.search(r"last\s+(\d+)\s+days?", text_norm)
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date_range_cached(text_norm: str, today: date) -> Tuple[date, date]:
+    # last N days / weeks / months / years
+    m = _LAST_N.search(text_norm)
     if m:
         n = int(m.group(1))
-        start = today - timedelta(days=n - 1 if n > 0 else 0)
+        unit = m.group(2)
+        if unit in ("month", "year"):
+            months = n * 12 if unit == "year" else n
+            start = _add_months(today, -months) + timedelta(days=1) if n > 0 else today
+        else:
+            days = n * 7 if unit == "week" else n
+            start = today - timedelta(days=days - 1 if days > 0 else 0)
         end = today
         return start, end
 
@@ -39,13 +149,22 @@ def parse_date_range(text: str) -> Tuple[date, date]:
     for sep in [" to ", " - ", " until "]:
         if sep in text_norm:
             left, right = text_norm.split(sep, 1)
-            start = _parse_single_date(left, default=today - timedelta(days=7))
-            end = _parse_single_date(right, default=today)
+            m = _TRAILING_DATE.search(left.strip())
+            left = m.group(1) if m else left
+            m = _LEADING_DATE.match(right.strip())
+            right = m.group(1) if m else right
+            start = _parse_single_date(left, default=today - timedelta(days=7), today=today)
+            end = _parse_single_date(right, default=today, today=today)
             if start and end and start <= end:
                 return start, end
 
+    # this/last week or month
+    m = _PERIOD.search(text_norm)
+    if m:
+        return _period_range(m.group(1), m.group(2), today)
+
     # Single date or keyword
-    single = _parse_single_date(text_norm)
+    single = _parse_single_date(text_norm, today=today)
     if single:
         return single, single
 
@@ -57,4 +176,3 @@ def human_range_label(start: date, end: date) -> str:
     if start == end:
         return start.strftime("%b %d, %Y")
     return f"{start.strftime('%b %d, %Y')} — {end.strftime('%b %d, %Y')}"
-
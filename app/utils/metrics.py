@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+# Samples kept per stage for the rolling percentiles
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1024"))
+
+# Prefix for every exported metric name
+METRICS_PREFIX = "steamnoodles"
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _Histogram:
+    """Rolling window of durations plus lifetime count and sum."""
+
+    __slots__ = ("samples", "count", "total")
+
+    def __init__(self) -> None:
+        self.samples: Deque[float] = deque(maxlen=METRICS_WINDOW)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        summary: Dict[str, float] = {"count": self.count, "sum": self.total}
+        for q in QUANTILES:
+            # Nearest-rank percentile over the window
+            summary[f"p{round(q * 100)}"] = ordered[max(0, math.ceil(len(ordered) * q) - 1)] if ordered else 0.0
+        return summary
+
+
+CounterKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_lock = threading.Lock()
+_histograms: Dict[str, _Histogram] = {}
+_counters: Dict[CounterKey, float] = {}
+_stats_sources: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+# Per-request stage totals; set by `request_breakdown`, inherited by tasks and to_thread
+_breakdown: ContextVar[Optional[Dict[str, float]]] = ContextVar("metrics_breakdown", default=None)
+
+
+def observe(name: str, seconds: float) -> None:
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = _Histogram()
+        hist.observe(seconds)
+    breakdown = _breakdown.get()
+    if breakdown is not None:
+        breakdown[name] = breakdown.get(name, 0.0) + seconds
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the enclosed block as stage `name`."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0)
+
+
+def incr(name: str, amount: float = 1, **labels: str) -> None:
+    key: CounterKey = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def register_stats(prefix: str, source: Callable[[], Dict[str, float]]) -> None:
+    """Export the numeric dict returned by `source` as `<prefix>_<key>` gauges."""
+    _stats_sources[prefix] = source
+
+
+@contextmanager
+def request_breakdown() -> Iterator[Dict[str, float]]:
+    """Collect per-stage seconds for everything timed inside the block."""
+    breakdown: Dict[str, float] = {}
+    token = _breakdown.set(breakdown)
+    try:
+        yield breakdown
+    finally:
+        _breakdown.reset(token)
+
+
+def timing_summary() -> Dict[str, Dict[str, float]]:
+    with _lock:
+        return {name: hist.snapshot() for name, hist in _histograms.items()}
+
+
+def counter_values() -> Dict[CounterKey, float]:
+    with _lock:
+        return dict(_counters)
+
+
+def reset_metrics() -> None:
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _labels(pairs: Tuple[Tuple[str, str], ...]) -> str:
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{str(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def prometheus_text() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+
+    stage = f"{METRICS_PREFIX}_stage_seconds"
+    lines.append(f"# HELP {stage} Time spent per request stage (rolling window quantiles).")
+    lines.append(f"# TYPE {stage} summary")
+    for name, summary in sorted(timing_summary().items()):
+        for q in QUANTILES:
+            value = summary[f"p{round(q * 100)}"]
+            lines.append(f'{stage}{{stage="{name}",quantile="{q}"}} {value:.6f}')
+        lines.append(f'{stage}_sum{{stage="{name}"}} {summary["sum"]:.6f}')
+        lines.append(f'{stage}_count{{stage="{name}"}} {summary["count"]}')
+
+    by_name: Dict[str, List[Tuple[Tuple[Tuple[str, str], ...], float]]] = {}
+    for (name, labels), value in counter_values().items():
+        by_name.setdefault(name, []).append((labels, value))
+    for name, series in sorted(by_name.items()):
+        metric = f"{METRICS_PREFIX}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for labels, value in sorted(series):
+            lines.append(f"{metric}{_labels(labels)} {value:g}")
+
+    for prefix, source in sorted(_stats_sources.items()):
+        try:
+            stats = source()
+        except Exception as e:
+            print(f"[metrics] Stats source {prefix} failed: {e}")
+            continue
+        for key, value in sorted(stats.items()):
+            metric = f"{METRICS_PREFIX}_{prefix}_{key}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {float(value):g}")
+
+    return "\n".join(lines) + "\n"
+
+
+def format_breakdown(breakdown: Dict[str, float], limit: int = 4) -> str:
+    """Short "llm 1.2s · db_insert 3ms" summary of the slowest stages."""
+    parts = []
+    for name, seconds in sorted(breakdown.items(), key=lambda kv: kv[1], reverse=True)[:limit]:
+        parts.append(f"{name} {seconds:.1f}s" if seconds >= 1 else f"{name} {seconds * 1000:.0f}ms")
+    return " · ".join(parts)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from typing import Optional, Sequence
+
+from app.data import db
+from app.data.archive import ARCHIVE_KEEP_MONTHS, archive_dir, archive_month, closed_months, remove_superseded
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Move closed months of reviews from SQLite into Parquet files.")
+    parser.add_argument("--db", help="SQLite file to archive from (default: the app database)")
+    parser.add_argument(
+        "--keep-months",
+        type=int,
+        default=ARCHIVE_KEEP_MONTHS,
+        help="Most recent months, including the current one, to keep in SQLite",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only list the months that would be archived")
+    parser.add_argument("--vacuum", action="store_true", help="Shrink the database file afterwards")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        db.use_database(args.db)
+    else:
+        db.init_db()
+
+    months = closed_months(args.keep_months)
+    if args.dry_run:
+        print("Would archive: " + ", ".join(months) if months else "Nothing to archive.")
+        return
+    # Files replaced by earlier runs, once no reader can still be using them
+    removed = remove_superseded()
+    if removed:
+        print(f"Removed {len(removed)} superseded archive files.")
+    if not months:
+        print("Nothing to archive.")
+        return
+
+    total = 0
+    t0 = time.perf_counter()
+    for month in months:
+        moved = archive_month(month)
+        total += moved
+        print(f"  {month}: {moved:,} reviews")
+    print(f"Archived {total:,} reviews from {len(months)} months to {archive_dir()} in {time.perf_counter() - t0:.1f}s.")
+
+    if args.vacuum:
+        before = os.path.getsize(db.DB_PATH)
+        with db.get_conn() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        db.close_connections()
+        conn = db._connect()
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        print(f"Database shrunk from {before / 1e6:,.1f} MB to {os.path.getsize(db.DB_PATH) / 1e6:,.1f} MB.")
+
+
+if __name__ == "__main__":
+    main()
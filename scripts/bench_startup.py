@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+
+# Project modules whose cold import time we track
+MODULES = [
+    "app.main",
+    "app.agents.response_agent",
+    "app.agents.plot_agent",
+    "app.agents.llm_provider",
+    "app.agents.sentiment",
+    "app.agents.render",
+    "app.data.db",
+    "app.data.cache",
+    "app.utils.date_utils",
+]
+
+
+def _import_times(module: str) -> Dict[str, float]:
+    """Import `module` in a fresh interpreter and return cumulative ms per imported module."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        try:
+            times[name.strip()] = int(cumulative.strip()) / 1000.0
+        except ValueError:
+            continue  # header row
+    return times
+
+
+def _parse_limits(values: Optional[List[str]]) -> Dict[str, float]:
+    limits: Dict[str, float] = {}
+    for value in values or []:
+        module, _, ms = value.partition("=")
+        limits[module] = float(ms)
+    return limits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the app modules.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module (median is reported)")
+    parser.add_argument("--top", type=int, default=10, help="Show the slowest dependencies pulled in by app.main")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    parser.add_argument(
+        "--max-ms",
+        action="append",
+        metavar="MODULE=MS",
+        help="Fail if MODULE's median import time exceeds MS (repeatable)",
+    )
+    args = parser.parse_args()
+
+    results: Dict[str, float] = {}
+    main_runs: List[Dict[str, float]] = []
+    for module in MODULES:
+        runs = [_import_times(module) for _ in range(args.repeat)]
+        if module == "app.main":
+            main_runs = runs
+        results[module] = statistics.median(run.get(module, 0.0) for run in runs)
+
+    width = max(len(m) for m in MODULES)
+    print(f"{'module':<{width}}  median ms")
+    for module, ms in results.items():
+        print(f"{module:<{width}}  {ms:9.1f}")
+
+    if main_runs and args.top > 0:
+        # Leave out what the bare interpreter loads at startup
+        baseline = _import_times("sys")
+        deps = {
+            name: statistics.median(run.get(name, 0.0) for run in main_runs)
+            for name in main_runs[0]
+            if "." not in name and not name.startswith("app") and name not in baseline
+        }
+        print("\nSlowest top-level imports under app.main:")
+        for name, ms in sorted(deps.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+            print(f"  {name:<24} {ms:9.1f}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "repeat": args.repeat, "import_ms": results}, f, indent=2)
+
+    failed = [
+        f"{module}: {results.get(module, 0.0):.1f} ms > {limit:.1f} ms"
+        for module, limit in _parse_limits(args.max_ms).items()
+        if results.get(module, 0.0) > limit
+    ]
+    if failed:
+        print("\nStartup budget exceeded:\n  " + "\n  ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
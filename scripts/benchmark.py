@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+DEFAULT_SIZES = "10000,1000000,10000000"
+COUNT_RANGES = (7, 90, 365)
+RENDER_RANGES = (7, 90, 365)
+LOAD_CHUNK = 100_000
+
+PROMPTS = [
+    "last 7 days",
+    "past 2 weeks",
+    "last 3 months",
+    "last 30 days",
+    "this week",
+    "last week",
+    "this month",
+    "last month",
+    "today",
+    "yesterday",
+    "yesterday to today",
+    "June 1 to June 15",
+    "1 June - 15 June",
+    "2024-06-01 - 2024-06-15",
+    "2024-06-01 to 2024-07-01",
+    "March 3 until March 9",
+    "from 2024-01-01 to 2024-03-31",
+    "June 10",
+    "2024-05-20",
+    "show me sentiment for the last 14 days",
+    "bar chart of the past 4 weeks",
+    "line chart for last month",
+    "two weeks ago to today",
+    "since last friday",
+    "first week of may",
+]
+
+_OPENERS = ["The", "Our", "My", "Honestly the", "Tonight the", "Last time the"]
+_SUBJECTS = ["ramen", "broth", "dumplings", "service", "staff", "noodles", "waiting time", "dessert", "music"]
+_VERDICTS = [
+    "was amazing",
+    "was great and fresh",
+    "was okay",
+    "was fine, nothing special",
+    "was cold and bland",
+    "was terrible",
+    "took forever",
+    "exceeded expectations",
+]
+
+
+class FakeReviewLLM(BaseChatModel):
+    """Deterministic stand-in for ChatOpenAI: the output depends only on the prompt."""
+
+    model_name: str = "fake-bench"
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bench"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        system = str(messages[0].content)
+        prompt = str(messages[-1].content)
+        if "visualization" in system:
+            chart = "bar" if "bar" in prompt.lower() else "line"
+            payload: Dict[str, str] = {"chart": chart, "title": "Sentiment trend"}
+        else:
+            sentiment = ("positive", "neutral", "negative")[zlib.crc32(prompt.encode("utf-8")) % 3]
+            payload = {"sentiment": sentiment, "reply": f"Thank you for your {sentiment} feedback about your visit!"}
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=json.dumps(payload)))])
+
+
+def _reviews(n: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(_OPENERS)} {rng.choice(_SUBJECTS)} {rng.choice(_VERDICTS)}. Visit #{i}"
+        for i in range(n)
+    ]
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - t0) * 1000.0)
+    return {"median_ms": statistics.median(runs), "min_ms": min(runs), "max_ms": max(runs)}
+
+
+def _rate(n: int, fn: Callable[[], Any]) -> Dict[str, float]:
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    return {"n": n, "seconds": elapsed, "per_s": n / elapsed if elapsed else 0.0}
+
+
+def bench_analyze(n: int, seed: int, latency: float) -> Dict[str, Any]:
+    from app.agents import router
+    from app.agents.llm_provider import override_llm
+    from app.agents.response_agent import analyze_and_respond, analyze_and_respond_batch
+
+    texts = _reviews(n, seed)
+    results: Dict[str, Any] = {}
+
+    routing = router.ROUTER_ENABLED
+    override_llm(FakeReviewLLM(latency=latency))
+    try:
+        # Every review reaches the model, so these stay comparable with runs from before the router
+        router.ROUTER_ENABLED = False
+        results["llm"] = _rate(n, lambda: [analyze_and_respond(t, use_cache=False) for t in texts])
+        results["llm_batch"] = _rate(n, lambda: analyze_and_respond_batch(texts, use_cache=False))
+        # As served: clear-cut reviews are answered without the model
+        router.ROUTER_ENABLED = True
+        results["llm_routed"] = _rate(n, lambda: [analyze_and_respond(t, use_cache=False) for t in texts])
+        results["llm_batch_routed"] = _rate(n, lambda: analyze_and_respond_batch(texts, use_cache=False))
+        results["routed_local_ratio"] = router.router_stats().get("review_local_ratio", 0.0)
+
+        # VADER mode: no LLM configured
+        router.ROUTER_ENABLED = False
+        os.environ["USE_LLM"] = "false"
+        results["vader"] = _rate(n, lambda: [analyze_and_respond(t) for t in texts])
+        results["vader_batch"] = _rate(n, lambda: analyze_and_respond_batch(texts))
+    finally:
+        router.ROUTER_ENABLED = routing
+        override_llm(None)
+    return results
+
+
+def bench_inserts(n_single: int, n_batch: int, seed: int) -> Dict[str, Any]:
+    from app.data.db import insert_review, insert_reviews
+
+    texts = _reviews(max(n_single, n_batch), seed)
+    labels = ("positive", "neutral", "negative")
+    return {
+        "insert_review": _rate(n_single, lambda: [insert_review(t, labels[i % 3]) for i, t in enumerate(texts[:n_single])]),
+        "insert_reviews": _rate(
+            n_batch, lambda: insert_reviews((t, labels[i % 3], None) for i, t in enumerate(texts[:n_batch]))
+        ),
+    }
+
+
+def _load_rows(n: int, days: int, seed: int) -> float:
+    """Bulk load `n` reviews spread evenly over the last `days` days; returns seconds."""
+    from app.data.db import get_conn, index_new_reviews
+
+    rng = random.Random(seed)
+    labels = ("positive", "positive", "neutral", "negative")
+    end = datetime.combine(date.today(), datetime.max.time())
+    step = timedelta(days=days) / n
+    start = end - timedelta(days=days)
+    t0 = time.perf_counter()
+    for offset in range(0, n, LOAD_CHUNK):
+        rows = [
+            (f"bench review {i % 997}", rng.choice(labels), (start + step * i).isoformat())
+            for i in range(offset, min(n, offset + LOAD_CHUNK))
+        ]
+        # Day versions only matter to the plot cache, so they are not maintained
+        # here; the FTS index is, or keyword counts would miss these rows
+        with get_conn() as conn:
+            conn.executemany("INSERT INTO reviews (text, sentiment, created_at) VALUES (?, ?, ?)", rows)
+            index_new_reviews(conn, len(rows))
+    return time.perf_counter() - t0
+
+
+def bench_counts(sizes: List[int], workdir: str, repeat: int, seed: int) -> Dict[str, Any]:
+    from app.data.db import get_sentiment_counts, get_sentiment_counts_by_day, use_database
+
+    today = date.today()
+    results: Dict[str, Any] = {}
+    for size in sizes:
+        path = os.path.join(workdir, f"counts_{size}.db")
+        use_database(path)
+        load_s = _load_rows(size, max(COUNT_RANGES), seed)
+        entry: Dict[str, Any] = {"load_rows_per_s": size / load_s if load_s else 0.0}
+        for days in COUNT_RANGES:
+            start = today - timedelta(days=days - 1)
+            entry[f"{days}d"] = _measure(lambda: get_sentiment_counts_by_day(start, today), repeat)
+            entry[f"{days}d_auto"] = _measure(lambda: get_sentiment_counts(start, today), repeat)
+        results[str(size)] = entry
+        print(f"  counts @ {size:>10,} rows: " + ", ".join(
+            f"{days}d {entry[f'{days}d']['median_ms']:.1f} ms" for days in COUNT_RANGES
+        ))
+        os.remove(path)
+    return results
+
+
+def bench_date_parsing(repeat: int) -> Dict[str, Any]:
+    from app.utils.date_utils import _parse_date_range_cached, parse_date_range
+
+    def run_corpus() -> None:
+        for prompt in PROMPTS:
+            parse_date_range(prompt)
+
+    def cold() -> None:
+        _parse_date_range_cached.cache_clear()
+        run_corpus()
+
+    cold_stats = _measure(cold, repeat)
+    warm_stats = _measure(run_corpus, repeat)
+    return {
+        "prompts": len(PROMPTS),
+        "cold_us_per_prompt": cold_stats["median_ms"] * 1000.0 / len(PROMPTS),
+        "warm_us_per_prompt": warm_stats["median_ms"] * 1000.0 / len(PROMPTS),
+    }
+
+
+def bench_render(repeat: int, seed: int) -> Dict[str, Any]:
+    import pandas as pd
+
+    from app.agents.plot_agent import _plot_counts
+
+    rng = random.Random(seed)
+    today = date.today()
+    results: Dict[str, Any] = {}
+    for days in RENDER_RANGES:
+        df = pd.DataFrame(
+            {
+                "date": [today - timedelta(days=days - 1 - i) for i in range(days)],
+                "positive": [rng.randint(0, 40) for _ in range(days)],
+                "neutral": [rng.randint(0, 20) for _ in range(days)],
+                "negative": [rng.randint(0, 15) for _ in range(days)],
+            }
+        )
+        for chart in ("bar", "line"):
+            results[f"{days}d_{chart}"] = _measure(
+                lambda: _plot_counts(df, chart, "Sentiment trend", f"Last {days} days"), repeat
+            )
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def _flatten(tree: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    for key, value in tree.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = float(value)
+    return flat
+
+
+def _compare(baseline_path: str, results: Dict[str, Any]) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = _flatten(json.load(f)["results"])
+    current = _flatten(results)
+    keys = [k for k in current if k in baseline and (k.endswith("median_ms") or k.endswith("per_s") or "_us_" in k)]
+    if not keys:
+        print("\nNo comparable results in baseline.")
+        return
+    width = max(len(k) for k in keys)
+    print(f"\n{'metric':<{width}}  {'baseline':>12}  {'current':>12}  change")
+    for key in keys:
+        old, new = baseline[key], current[key]
+        change = (new - old) / old * 100.0 if old else 0.0
+        print(f"{key:<{width}}  {old:12.2f}  {new:12.2f}  {change:+6.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the agents, DB and rendering hot paths.")
+    parser.add_argument("--reviews", type=int, default=500, help="Reviews per analyze_and_respond run")
+    parser.add_argument("--inserts", type=int, default=2000, help="Rows for the single-row insert_review run")
+    parser.add_argument("--batch-inserts", type=int, default=50000, help="Rows for the insert_reviews run")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated table sizes for the count query")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per timed query/render (median is reported)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the fake LLM sleeps per call")
+    parser.add_argument("--render-workers", type=int, default=0, help="PLOT_RENDER_WORKERS for the render run")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=["analyze", "inserts", "counts", "dates", "render"],
+        help="Run only these sections (repeatable)",
+    )
+    parser.add_argument("--output", default="benchmark.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    # Settings read at import time must be in place before the app modules load
+    os.environ["REVIEW_WRITE_MODE"] = "sync"
+    os.environ["PLOT_RENDER_WORKERS"] = str(args.render_workers)
+    os.environ["USE_LLM"] = "true"
+
+    from app.agents.router import ROUTER_THRESHOLD
+    from app.data.db import use_database
+
+    sections = set(args.only or ["analyze", "inserts", "counts", "dates", "render"])
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    workdir = tempfile.mkdtemp(prefix="steamnoodles-bench-")
+    results: Dict[str, Any] = {}
+    try:
+        use_database(os.path.join(workdir, "bench.db"))
+        if "inserts" in sections:
+            print("Inserts...")
+            results["inserts"] = bench_inserts(args.inserts, args.batch_inserts, args.seed)
+        if "analyze" in sections:
+            print("analyze_and_respond...")
+            results["analyze"] = bench_analyze(args.reviews, args.seed, args.llm_latency)
+        if "dates" in sections:
+            print("parse_date_range...")
+            results["parse_date_range"] = bench_date_parsing(args.repeat)
+        if "render" in sections:
+            print("Rendering...")
+            results["render"] = bench_render(args.repeat, args.seed)
+        if "counts" in sections:
+            print("Count queries...")
+            results["counts"] = bench_counts(sizes, workdir, args.repeat, args.seed)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+            # "llm"/"llm_batch" run with the router off, the "*_routed" variants with these settings
+            "router": {"threshold": ROUTER_THRESHOLD},
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        _compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import time
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+from app.data.db import init_db
+from app.agents.response_agent import analyze_and_respond_batch
+
+
+# Bad rows listed individually in the final report
+MAX_REPORTED_ERRORS = 20
+
+BadRow = Tuple[int, str]
+
+
+def _parse_timestamp(value: object) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f"timestamp must be a string, got {type(value).__name__}")
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"invalid ISO timestamp {value.strip()!r}") from None
+    if parsed.tzinfo is not None:
+        # The DB stores naive UTC timestamps
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _validate(record: object, text_field: str, time_field: str) -> Optional[Tuple[str, Optional[datetime]]]:
+    """(text, created_at) for a record, None if it has no text; raises ValueError if it is malformed."""
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    text = record.get(text_field)
+    if text is None:
+        return None
+    if not isinstance(text, str):
+        raise ValueError(f"{text_field} must be a string, got {type(text).__name__}")
+    if not text.strip():
+        return None
+    return text.strip(), _parse_timestamp(record.get(time_field))
+
+
+def _read_records(f: TextIO, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(line number, record) pairs; records that fail to decode come through as the ValueError."""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_no, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"invalid JSON: {e}")
+
+
+def _read_rows(
+    path: str, fmt: str, text_field: str, time_field: str, bad_rows: List[BadRow]
+) -> Iterator[Tuple[str, Optional[datetime]]]:
+    """Valid (text, created_at) rows; malformed ones are appended to `bad_rows` and skipped."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_no, record in _read_records(f, fmt):
+            try:
+                if isinstance(record, ValueError):
+                    raise record
+                row = _validate(record, text_field, time_field)
+            except ValueError as e:
+                bad_rows.append((line_no, str(e)))
+                continue
+            if row is not None:
+                yield row
+
+
+def _chunks(rows: Iterator[Tuple[str, Optional[datetime]]], size: int) -> Iterator[List[Tuple[str, Optional[datetime]]]]:
+    chunk: List[Tuple[str, Optional[datetime]]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-import customer reviews from a CSV or JSONL file.")
+    parser.add_argument("path", help="CSV (with a header row) or JSONL file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format (default: from file extension)")
+    parser.add_argument("--text-field", default="text", help="Column/key holding the review text")
+    parser.add_argument("--time-field", default="created_at", help="Column/key holding an ISO timestamp (optional)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Reviews scored and written per transaction")
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.path.lower().endswith((".jsonl", ".ndjson")) else "csv")
+    init_db()
+
+    total = 0
+    bad_rows: List[BadRow] = []
+    t0 = time.perf_counter()
+    rows = _read_rows(args.path, fmt, args.text_field, args.time_field, bad_rows)
+    for chunk in _chunks(rows, args.batch_size):
+        texts = [text for text, _ in chunk]
+        timestamps = [ts for _, ts in chunk]
+        analyze_and_respond_batch(texts, created_at=timestamps)
+        total += len(chunk)
+        elapsed = time.perf_counter() - t0
+        print(f"[import_reviews] {total} reviews imported ({total / elapsed:.0f} reviews/s)")
+
+    elapsed = time.perf_counter() - t0
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"Imported {total} reviews in {elapsed:.1f}s ({rate:.0f} reviews/s).")
+    if bad_rows:
+        print(f"Skipped {len(bad_rows)} malformed rows:")
+        for line_no, reason in bad_rows[:MAX_REPORTED_ERRORS]:
+            print(f"  line {line_no}: {reason}")
+        if len(bad_rows) > MAX_REPORTED_ERRORS:
+            print(f"  ... and {len(bad_rows) - MAX_REPORTED_ERRORS} more")
+
+
+if __name__ == "__main__":
+    main()
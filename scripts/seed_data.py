@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import argparse
+import contextlib
+import itertools
+import math
 import random
-from datetime import datetime, timedelta
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple
 
-from app.data.db import init_db, insert_review
+from app.data.db import bulk_load, init_db, insert_reviews, use_database
 
 
 SAMPLE_POSITIVE = [
@@ -27,36 +33,144 @@ SAMPLE_NEGATIVE = [
     "Disappointed with the quality this time.",
 ]
 
+# Fragments combined into generated reviews: opener + subject + verdict + closer
+OPENERS = ["", "Honestly, ", "Tonight ", "On my last visit ", "For lunch today ", "We came as a group and "]
+SUBJECTS = [
+    "the ramen", "the spicy broth", "the dumplings", "the tonkotsu", "the gyoza", "the staff",
+    "the service", "the noodles", "the waiting time", "the dessert", "the ambiance", "the portions",
+]
+VERDICTS = {
+    "positive": [
+        "was incredible", "was delicious", "exceeded expectations", "was perfect", "was super friendly",
+        "was fast and fresh", "made our evening",
+    ],
+    "neutral": [
+        "was okay", "was fine", "was average", "was as expected", "could have been a bit better",
+        "was reasonable",
+    ],
+    "negative": [
+        "was cold", "was overcooked and bland", "was a letdown", "took forever", "was rude",
+        "was way too salty", "was disappointing",
+    ],
+}
+CLOSERS = {
+    "positive": ["", " Will be back!", " Highly recommend.", " Thanks!"],
+    "neutral": ["", " Might try again.", " Nothing special.", " Prices are fair."],
+    "negative": ["", " Not coming back.", " Please fix this.", " Expected more."],
+}
+SAMPLES = {"positive": SAMPLE_POSITIVE, "neutral": SAMPLE_NEUTRAL, "negative": SAMPLE_NEGATIVE}
+LABELS = ("positive", "neutral", "negative")
+
+# Relative traffic Monday..Sunday
+WEEKDAY_WEIGHTS = (0.8, 0.85, 0.9, 1.0, 1.3, 1.45, 1.2)
+
+ReviewRow = Tuple[str, str, datetime]
+
+
+def _review_text(rng: random.Random, sentiment: str) -> str:
+    # A share of the original hand-written samples keeps duplicates realistic
+    if rng.random() < 0.2:
+        return rng.choice(SAMPLES[sentiment])
+    text = f"{rng.choice(OPENERS)}{rng.choice(SUBJECTS)} {rng.choice(VERDICTS[sentiment])}.{rng.choice(CLOSERS[sentiment])}"
+    return text[0].upper() + text[1:]
+
+
+def _daily_volume(rng: random.Random, day: date, per_day: float, seasonality: float) -> int:
+    """Weekly pattern plus a yearly wave peaking in winter, with Poisson-like noise."""
+    yearly = 1.0 + seasonality * math.cos(2 * math.pi * (day.timetuple().tm_yday - 15) / 365.25)
+    weekly = 1.0 + seasonality * (WEEKDAY_WEIGHTS[day.weekday()] - 1.0)
+    mean = max(0.0, per_day * yearly * weekly)
+    return max(0, round(rng.gauss(mean, math.sqrt(mean)))) if mean else 0
+
+
+def generate_reviews(
+    start: date,
+    end: date,
+    per_day: float,
+    mix: Sequence[float],
+    seasonality: float,
+    seed: int,
+) -> Iterator[ReviewRow]:
+    """Yield (text, sentiment, created_at) rows day by day in time order.
 
-def main() -> None:
-    random.seed(7)
-    init_db()
-    today = datetime.utcnow().date()
-    start = today - timedelta(days=29)
-    for day_offset in range(30):
-        day = start + timedelta(days=day_offset)
-        # Random number of reviews per day
-        for _ in range(random.randint(2, 8)):
-            bucket = random.choices(
-                population=["positive", "neutral", "negative"],
-                weights=[0.5, 0.3, 0.2],
-                k=1,
-            )[0]
-            if bucket == "positive":
-                text = random.choice(SAMPLE_POSITIVE)
-            elif bucket == "neutral":
-                text = random.choice(SAMPLE_NEUTRAL)
-            else:
-                text = random.choice(SAMPLE_NEGATIVE)
-
-            created_at = datetime.combine(day, datetime.min.time()) + timedelta(
-                minutes=random.randint(0, 60 * 12)
-            )
-            insert_review(text, bucket, created_at)
-
-    print("Seeded 30 days of synthetic reviews into SQLite.")
+    Reproducible for a given seed. Reviews fall within opening hours
+    (11:00-23:00), weighted towards lunch and dinner.
+    """
+    rng = random.Random(seed)
+    day = start
+    while day <= end:
+        n = _daily_volume(rng, day, per_day, seasonality)
+        midnight = datetime.combine(day, datetime.min.time())
+        offsets = sorted(
+            min(max(rng.gauss(rng.choice((12.75, 19.5)), 1.5), 11.0), 22.99) * 3600.0 for _ in range(n)
+        )
+        sentiments = rng.choices(LABELS, weights=mix, k=n)
+        for offset, sentiment in zip(offsets, sentiments):
+            yield _review_text(rng, sentiment), sentiment, midnight + timedelta(seconds=offset)
+        day += timedelta(days=1)
+
+
+def _parse_mix(value: str) -> List[float]:
+    parts = [float(p) for p in value.split(",")]
+    if len(parts) != 3 or any(p < 0 for p in parts) or not sum(parts):
+        raise argparse.ArgumentTypeError("mix must be three non-negative weights: positive,neutral,negative")
+    return parts
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic reviews into the SQLite store.")
+    span = parser.add_mutually_exclusive_group()
+    span.add_argument("--days", type=int, default=30, help="Days of history ending at --end")
+    span.add_argument("--years", type=float, help="Years of history ending at --end (overrides --days)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day to generate (default: today, UTC)")
+    parser.add_argument("--per-day", type=float, default=5.0, help="Mean reviews per day before seasonality")
+    parser.add_argument("--mix", type=_parse_mix, default=[0.5, 0.3, 0.2], help="positive,neutral,negative weights")
+    parser.add_argument("--seasonality", type=float, default=0.3, help="Weekly/yearly volume swing, 0 disables")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db", help="SQLite file to write (default: the app database)")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="Rows per transaction")
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Drop the reviews indexes during the load and rebuild them afterwards (for millions of rows); "
+        "needs --db",
+    )
+    args = parser.parse_args(argv)
+    if args.fast and not args.db:
+        # Dropping the indexes would slow down every process serving the app database
+        parser.error("--fast only loads into a scratch database given with --db")
+
+    if args.db:
+        use_database(args.db)
+    else:
+        init_db()
+
+    end = args.end or datetime.utcnow().date()
+    days = round(args.years * 365) if args.years else args.days
+    start = end - timedelta(days=max(days, 1) - 1)
+    rows = generate_reviews(start, end, args.per_day, args.mix, args.seasonality, args.seed)
+
+    total = 0
+    t0 = time.perf_counter()
+    with bulk_load() if args.fast else contextlib.nullcontext():
+        while True:
+            batch = list(itertools.islice(rows, args.batch_size))
+            if not batch:
+                break
+            total += insert_reviews(batch)
+            elapsed = time.perf_counter() - t0
+            print(f"\r  {total:,} rows ({total / elapsed:,.0f} rows/s)", end="", flush=True)
+        load_elapsed = time.perf_counter() - t0
+        if args.fast:
+            print("\n  rebuilding indexes...", end="", flush=True)
+    elapsed = time.perf_counter() - t0
+
+    print(
+        f"\nSeeded {total:,} reviews from {start} to {end} in {elapsed:.1f}s "
+        f"({total / elapsed if elapsed else 0:,.0f} rows/s overall, "
+        f"{total / load_elapsed if load_elapsed else 0:,.0f} rows/s load)."
+    )
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+import pytest
+
+from app.agents import router
+from app.agents.llm_provider import override_llm
+from app.agents.response_agent import analyze_and_respond
+from app.data import archive, cache, db, writer
+from scripts.benchmark import FakeReviewLLM
+
+pytest.importorskip("pyarrow")
+
+LABELS = ("positive", "neutral", "negative")
+TEXTS = (
+    "The broth was rich and the noodles perfect",
+    "My brother loved the gyoza",
+    "Brothy ramen, slow service",
+    "Great café vibes, friendly staff",
+    "Cafe was noisy but the dumplings were good",
+    "Service was slow and the noodles cold",
+    "don't miss the tonkotsu",
+)
+KEYWORDS = ("", "broth", "brother", "broths", "café", "CAFE", "noodles", "service slow", "don't", "!!!")
+RANGES = (
+    (date(2024, 1, 1), date(2024, 3, 31)),
+    (date(2024, 1, 15), date(2024, 2, 10)),
+    (date(2024, 2, 29), date(2024, 2, 29)),
+)
+
+
+@pytest.fixture
+def scratch_db(tmp_path, monkeypatch):
+    """An empty database and archive folder under tmp_path; the app database is never touched."""
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(writer, "WRITE_MODE", "sync")
+    db.close_connections()
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "feedback.db"))
+    db.init_db()
+    archive._partition_counts.cache_clear()
+    yield
+    archive._partition_counts.cache_clear()
+    db.close_connections()
+
+
+def _seed() -> None:
+    start = datetime(2024, 1, 1, 9)
+    db.insert_reviews(
+        (TEXTS[i % len(TEXTS)], LABELS[i % 3], start + timedelta(hours=7 * i)) for i in range(310)
+    )
+
+
+def _snapshot() -> Dict[Any, Any]:
+    out: Dict[Any, Any] = {}
+    for start, end in RANGES:
+        for keyword in KEYWORDS:
+            for bucket in ("hour", "day", "week", "month"):
+                counts = db.get_sentiment_counts(start, end, bucket, keyword)
+                out["counts", start, end, bucket, keyword] = counts.to_dict("list")
+            for sentiment in (None, "negative"):
+                found = db.search_reviews(keyword, start, end, sentiment, limit=7)
+                out["search", start, end, sentiment, keyword] = found["id"].tolist()
+        fetched = db.fetch_reviews_between(start, end)
+        out["fetch", start, end] = sorted(zip(fetched["id"], fetched["text"], fetched["sentiment"]))
+    for keyword in KEYWORDS:
+        out["search_all", keyword] = db.search_reviews(keyword, limit=1000)["id"].tolist()
+    return out
+
+
+def _live_rows() -> int:
+    with db.get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+
+def test_archiving_keeps_counts_fetch_and_search(scratch_db):
+    _seed()
+    before = _snapshot()
+    moved = archive.archive_month("2024-01") + archive.archive_month("2024-02")
+    assert moved > 0 and _live_rows() == 310 - moved
+    archive._partition_counts.cache_clear()
+    assert _snapshot() == before
+
+
+def test_archived_keywords_match_like_the_fts_index(scratch_db):
+    _seed()
+    archive.archive_month("2024-01")
+    texts = set(db.search_reviews("broth", date(2024, 1, 1), date(2024, 1, 31), limit=1000)["text"])
+    # Stemmed, whole-term matches: "brother" and "brothy" are other words
+    assert texts == {TEXTS[0]}
+    accents = db.search_reviews("cafe", date(2024, 1, 1), date(2024, 1, 31), limit=1000)["text"]
+    assert set(accents) == {TEXTS[3], TEXTS[4]}
+
+
+def test_id_range_reads_only_partitions_it_overlaps(scratch_db, monkeypatch):
+    _seed()
+    archive.archive_month("2024-01")
+    with db.get_conn() as conn:
+        archived_max = conn.execute("SELECT max_id FROM review_archive WHERE month = '2024-01'").fetchone()[0]
+    reads: List[str] = []
+    read_partition = archive._read_partition
+
+    def counting_read(path: str, *args: Any, **kwargs: Any) -> Any:
+        reads.append(path)
+        return read_partition(path, *args, **kwargs)
+
+    monkeypatch.setattr(archive, "_read_partition", counting_read)
+
+    upto = db.max_review_id()
+    late = db.insert_review("late broth review", "negative", datetime(2024, 1, 20, 12))
+    delta = db.get_sentiment_counts(date(2024, 1, 1), date(2024, 3, 31), "month", None, (upto, late))
+    assert delta[["positive", "neutral", "negative"]].values.tolist() == [[0, 0, 1]]
+    assert reads == []
+
+    full = db.get_sentiment_counts(date(2024, 1, 1), date(2024, 1, 31), "month", None, (0, archived_max))
+    assert int(full[["positive", "neutral", "negative"]].values.sum()) == archived_max
+    assert len(reads) == 1
+
+
+def test_rearchiving_keeps_the_replaced_file_for_the_grace_period(scratch_db):
+    _seed()
+    archive.archive_month("2024-01")
+    db.insert_review("late broth review", "negative", datetime(2024, 1, 20, 12))
+    with db.get_conn() as conn:
+        (old,) = conn.execute("SELECT path FROM review_archive WHERE month = '2024-01'").fetchone()
+    before = _snapshot()
+    assert archive.archive_month("2024-01") == 1
+    assert len(os.listdir(archive.archive_dir())) == 2
+    assert archive.remove_superseded() == []
+    assert archive.remove_superseded(grace_seconds=0) == [old]
+    assert old not in os.listdir(archive.archive_dir())
+    archive._partition_counts.cache_clear()
+    assert _snapshot() == before
+
+
+def test_unreadable_partition_fails_the_query(scratch_db):
+    _seed()
+    archive.archive_month("2024-01")
+    for name in os.listdir(archive.archive_dir()):
+        os.remove(os.path.join(archive.archive_dir(), name))
+    with pytest.raises(RuntimeError, match="2024-01"):
+        db.get_sentiment_counts(date(2024, 1, 1), date(2024, 1, 31), "day")
+    with pytest.raises(RuntimeError, match="2024-01"):
+        db.fetch_reviews_between(date(2024, 1, 1), date(2024, 1, 31))
+
+
+class CountingLLM(FakeReviewLLM):
+    calls: int = 0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+
+@pytest.fixture
+def fake_llm(scratch_db, monkeypatch):
+    monkeypatch.setenv("RESPONSE_CACHE", "true")
+    monkeypatch.setattr(router, "ROUTER_ENABLED", False)
+    llm = CountingLLM()
+    override_llm(llm)
+    yield llm
+    override_llm(None)
+
+
+def test_response_cache_hit_miss_and_ttl(fake_llm):
+    stats = cache.response_cache_stats()
+    first = analyze_and_respond("The ramen was fine.")
+    assert fake_llm.calls == 1
+    # Case and whitespace variants share the entry
+    assert analyze_and_respond("  the RAMEN   was fine. ") == first
+    assert fake_llm.calls == 1
+    assert cache.response_cache_stats()["hits"] == stats["hits"] + 1
+
+    analyze_and_respond("The ramen was fine.", use_cache=False)
+    assert fake_llm.calls == 2
+
+    with db.get_conn() as conn:
+        conn.execute("UPDATE response_cache SET created_at = created_at - ?", (cache.CACHE_TTL + 1,))
+    assert analyze_and_respond("The ramen was fine.") == first
+    assert fake_llm.calls == 3
+
+
+def test_response_cache_hits_do_not_write(fake_llm):
+    analyze_and_respond("The gyoza were crisp.")
+    with db.get_conn() as conn:
+        (key,) = conn.execute("SELECT key FROM response_cache").fetchone()
+        writes = conn.total_changes
+    for _ in range(5):
+        assert cache.get_cached_response(key) is not None
+    with db.get_conn() as conn:
+        assert conn.total_changes == writes